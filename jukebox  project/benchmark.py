@@ -0,0 +1,146 @@
+import argparse  # Importing argparse to read the command line options
+import json  # Importing the json module to write the catalogue and the results
+import os  # Importing the os module to create the synthetic catalogue
+import platform  # Importing platform to record where the benchmark ran
+import random  # Importing random to pick track IDs to look up
+import sys  # Importing sys to record the Python version
+import tempfile  # Importing tempfile for the synthetic catalogue folders
+import time  # Importing time for the timers
+import tracemalloc  # Importing tracemalloc to measure the memory the library takes
+
+LOOKUPS = 1000  # Number of ID lookups and uniqueness checks timed per size
+
+
+def generate_catalogue(folder, size):  # Function to create a Tracks folder and track_data.json with a number of tracks
+    tracks = os.path.join(folder, "Tracks")  # Folder for the track files
+    os.mkdir(tracks)  # Create it
+    library = {}  # Library data to save
+    for i in range(size):  # Loop through each synthetic track
+        file_name = f"Song {i:07d}.mp3"  # Unique file name
+        open(os.path.join(tracks, file_name), "wb").close()  # Empty file, only the listing matters
+        library[file_name] = {"id": f"{i + 1:02d}", "artist": f"Artist {i % 5000}", "rating": i % 6, "play_count": i % 50}  # Track data
+    with open(os.path.join(folder, "track_data.json"), "w") as f:  # Open the data file in write mode
+        json.dump(library, f, indent=4)  # Write it the way save_library does
+
+
+def timed(function, repeat=1):  # Function to run a function and return the best time in seconds
+    best = None  # Fastest run so far
+    for _ in range(repeat):  # Run it a few times
+        start = time.perf_counter()  # Start the clock
+        function()  # Run the function
+        elapsed = time.perf_counter() - start  # Stop the clock
+        best = elapsed if best is None else min(best, elapsed)  # Keep the fastest
+    return best  # Return the best time
+
+
+def measure_memory(function):  # Function to run a function and return (bytes still allocated, peak bytes)
+    tracemalloc.start()  # Start tracking allocations
+    try:
+        function()  # Run the function
+        return tracemalloc.get_traced_memory()  # Memory held afterwards and at the peak
+    finally:
+        tracemalloc.stop()  # Stop tracking, it slows everything down
+
+
+def time_refresh(track_library):  # Function to time UpdateTracks.refresh_track_list in a hidden Tk window
+    try:
+        import tkinter as tk  # Import tkinter for GUI
+        root = tk.Tk()  # Create a Tkinter window
+    except Exception as e:  # No display, for example on a server
+        return None, f"Tk unavailable: {e}"
+    root.withdraw()  # Keep the window hidden
+    try:
+        from update_tracks import UpdateTracks  # Import the screen only when Tk works
+        screen = UpdateTracks(tk.Frame(root))  # Build the screen, which also draws the table once
+        try:
+            track_library.stop_watching()  # The benchmark does not need the folder watcher
+            elapsed = timed(screen.refresh_track_list, repeat=3)  # Time a full refresh
+            root.update()  # Let Tk finish drawing
+            return elapsed, None
+        finally:
+            track_library.remove_listener(screen.changed_tracks.add)  # Stop the screen hearing about later catalogues
+            screen.window.after_cancel(screen.check_job)  # Stop its change check
+    finally:
+        root.destroy()  # Close the window
+
+
+def run_size(size, repeat):  # Function to benchmark the library on a synthetic catalogue of a given size
+    results = {"size": size}  # Results for this size
+    with tempfile.TemporaryDirectory() as folder:  # Build the catalogue in a throwaway folder
+        results["generate"] = timed(lambda: generate_catalogue(folder, size))  # Time the generation too
+        os.chdir(folder)  # track_library uses paths relative to the working folder
+        import track_library  # Already imported by main, this only gets the module
+        import storage  # Already imported by track_library, this only gets the module
+        json_storage = storage.JsonStorage(track_library.data_file, track_library.journal_file, track_library.journal_compact_size)  # The JSON files on their own
+        results["load_json_streaming"] = timed(json_storage.load, repeat)  # Load the JSON snapshot one track at a time, as the JSON backend does
+
+        def load_json_full():  # Function to load the JSON snapshot all at once, as before the streaming reader
+            with open(track_library.data_file, "r") as f:  # Open the data file in read mode
+                return json.load(f)
+
+        results["load_json_full"] = timed(load_json_full, repeat)  # For comparison with the streaming load
+        track_library.scan_state = None  # Forget the scan of any previous catalogue
+        results["load_library_first"] = timed(track_library.load_library)  # First load, includes moving JSON into SQLite
+        results["load_library"] = timed(track_library.load_library, repeat)  # Normal load
+        track_library.library.clear()  # Free the loaded library so only the next load is measured
+        results["library_memory_bytes"], results["load_library_peak_bytes"] = measure_memory(track_library.load_library)  # Memory of a loaded library
+        track_library.scan_state = None  # Make the next scan a cold one
+        results["list_tracks_cold"] = timed(track_library.list_tracks)  # Scan with no saved scan
+        results["list_tracks"] = timed(track_library.list_tracks, repeat)  # Scan with the folder unchanged
+        results["save_library"] = timed(track_library.save_library, repeat)  # Full save
+        files = list(track_library.library)  # Every file name
+        ids = [track_library.library[f]["id"] for f in random.sample(files, min(LOOKUPS, len(files)))]  # IDs to look up
+        results["id_lookup"] = timed(lambda: [track_library.find_track(i) for i in ids], repeat) / len(ids)  # As in add_to_playlist
+        results["id_unique_check"] = timed(lambda: [track_library.is_id_used(i, exclude="") for i in ids], repeat) / len(ids)  # As in update_track
+
+        def play_and_flush():  # Function to record a batch of plays and write them
+            for file_name in files[:100]:  # The same hundred tracks each time
+                track_library.record_play(file_name)  # Add a play
+            track_library.flush_journal()  # Write the batch
+
+        results["play_batch_flush_100"] = timed(play_and_flush, repeat)  # As after a hundred plays
+        results["refresh_track_list"], note = time_refresh(track_library)  # As after a track update
+        if note:  # If the UI could not be timed
+            results["refresh_track_list_note"] = note  # Say why
+        track_library.storage = None  # Let go of the database before the folder is removed
+        os.chdir(os.path.dirname(folder))  # Leave the folder so it can be removed
+    return results  # Return the results
+
+
+def main():  # Function to run the benchmark from the command line
+    parser = argparse.ArgumentParser(description="Benchmark the jukebox track library on synthetic catalogues.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000, 1000000], help="catalogue sizes to test")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per timing, the fastest is kept")
+    parser.add_argument("--output", help="JSON file to write the results to (default: print them)")
+    parser.add_argument("--label", default="", help="name for this run, such as a version or commit, to tell results apart")
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))  # Find the jukebox modules from any working folder
+    start_folder = os.getcwd()  # Remember where the results go
+    with tempfile.TemporaryDirectory() as folder:  # Import the library away from any real catalogue
+        os.chdir(folder)  # The import loads and scans the working folder
+        import track_library  # Import the library once
+        track_library.storage = None  # Let go of the empty database before the folder is removed
+        os.chdir(start_folder)  # Go back
+    report = {  # Everything needed to compare two runs
+        "label": args.label,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "storage": os.environ.get("JUKEBOX_STORAGE", "sqlite"),
+        "results": [],
+    }
+    for size in args.sizes:  # Loop through each size
+        print(f"Benchmarking {size} tracks...", file=sys.stderr)  # Show progress
+        report["results"].append(run_size(size, args.repeat))  # Run it
+    os.chdir(start_folder)  # Go back to where the benchmark was started
+    text = json.dumps(report, indent=4)  # Machine-readable results
+    if args.output:  # If a file was asked for
+        with open(args.output, "w") as f:  # Open it in write mode
+            f.write(text)  # Write the results
+    else:
+        print(text)  # Print the results
+
+
+if __name__ == "__main__":  # If running as main program
+    main()  # Run the benchmark
@@ -0,0 +1,119 @@
+import argparse  # Importing argparse to read the command line options
+import csv  # Importing csv to read bulk updates
+import os  # Importing the os module to interact with the operating system
+import struct  # Importing struct to catch errors from damaged MP3 headers
+import sys  # Importing sys to report problems on stderr
+import time  # Importing time to report how long the import took
+from concurrent.futures import ProcessPoolExecutor  # Importing the process pool to read files on every core
+import mp3_probe  # Importing the MP3 header and tag reader
+
+
+def probe_track(path):  # Function run in a worker process: read the tags and length of one file
+    try:
+        stat = os.stat(path)  # Get the file size and modification time
+        tags = mp3_probe.read_tags(path)  # Read the ID3 tags
+        duration = mp3_probe.probe_duration(path)  # Read the length from the MP3 headers, None if no frame was found
+    except (OSError, ValueError, IndexError, struct.error) as e:  # A damaged file should not stop the import
+        return os.path.basename(path), None, str(e)
+    return os.path.basename(path), {"tags": tags, "duration": duration, "duration_key": (stat.st_size, stat.st_mtime)}, None
+
+
+def next_free_id(is_id_used, start):  # Function to find the next unused numeric ID
+    number = start  # Start from the given number
+    while is_id_used(f"{number:02d}"):  # Skip IDs already taken
+        number += 1  # Try the next one
+    return number  # Return the free number
+
+
+def main():  # Function to run the bulk import from the command line
+    parser = argparse.ArgumentParser(description="Read tags and lengths of every MP3 in Tracks/, assign IDs and apply CSV updates in one write.")
+    parser.add_argument("--csv", help="CSV file with a file column and any of id, artist, rating")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per core)")
+    parser.add_argument("--no-ids", action="store_true", help="do not assign IDs to tracks that have none")
+    parser.add_argument("--overwrite-artists", action="store_true", help="replace artists already set with the ones from the tags")
+    args = parser.parse_args()
+
+    start = time.perf_counter()  # Start the clock
+    import track_library  # Imported here so worker processes do not load the library too
+    from track_library import library  # The shared library dictionary
+    track_library.list_tracks()  # Pick up new files in the track folder
+
+    changes = {}  # Updated data for each changed track
+    to_probe = []  # Paths whose tags or length need reading
+    for file_name, info in library.items():  # Loop through every track
+        path = os.path.join(track_library.track_folder, file_name)  # Get track path
+        try:
+            stat = os.stat(path)  # Get the file size and modification time
+        except OSError:  # Skip tracks whose file is gone
+            continue
+        if info.get("duration_key") != (stat.st_size, stat.st_mtime):  # If the file is new or changed since it was last read
+            to_probe.append(path)  # Read it
+
+    probed = 0  # Files read successfully
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:  # One worker per core
+        for file_name, result, error in pool.map(probe_track, to_probe, chunksize=64):  # Hand out files in chunks
+            if error is not None:  # If the file could not be read
+                print(f"Skipping {file_name}: {error}", file=sys.stderr)
+                continue
+            probed += 1  # Count the file
+            info = dict(library[file_name])  # Copy the track data
+            if result["duration"]:  # A failed probe is not cached, the player falls back to decoding the file
+                info["duration"] = result["duration"]  # Cached length
+                info["duration_key"] = result["duration_key"]  # File the length belongs to
+            if result["tags"].get("artist") and (args.overwrite_artists or not info.get("artist")):  # If the tag should be used
+                info["artist"] = result["tags"]["artist"]  # Artist from the tags
+            if info != dict(library[file_name]):  # If anything was learned from the file
+                changes[file_name] = info  # Queue the change
+
+    updated = 0  # CSV rows applied
+    batch_ids = {}  # Maps each ID set in this batch to its file
+    if args.csv:  # If bulk updates were given
+        with open(args.csv, newline="", encoding="utf-8-sig") as f:  # Open the CSV file
+            for line, row in enumerate(csv.DictReader(f), start=2):  # Loop through each row after the header
+                file_name = (row.get("file") or "").strip()  # Get the file name
+                if file_name not in library:  # If the file is unknown
+                    print(f"Line {line}: unknown file {file_name!r}", file=sys.stderr)
+                    continue
+                info = dict(changes.get(file_name) or library[file_name])  # Copy the data, building on any change from the tags
+                new_id = (row.get("id") or "").strip()  # Get the new ID
+                if new_id:  # If an ID was given
+                    taken = track_library.is_id_used(new_id, exclude=file_name) or batch_ids.get(new_id, file_name) != file_name  # Check the library and this batch
+                    if not new_id.isdigit() or taken:  # IDs must be numeric and unique
+                        print(f"Line {line}: ID {new_id!r} is not a number or is already used", file=sys.stderr)
+                        continue
+                    info["id"] = new_id  # Set the ID
+                if row.get("artist"):  # If an artist was given
+                    info["artist"] = row["artist"].strip()  # Set the artist
+                if row.get("rating"):  # If a rating was given
+                    rating = row["rating"].strip()  # Get the rating
+                    if not rating.isdigit() or not 1 <= int(rating) <= 5:  # Ratings go from 1 to 5
+                        print(f"Line {line}: rating {rating!r} is not between 1 and 5", file=sys.stderr)
+                        continue
+                    info["rating"] = int(rating)  # Set the rating
+                if new_id:  # Only once the whole row is valid
+                    batch_ids[new_id] = file_name  # Reserve the ID
+                changes[file_name] = info  # Queue the change
+                updated += 1  # Count the row
+
+    assigned = 0  # IDs handed out
+    if not args.no_ids:  # Unless asked not to
+        is_used = lambda track_id: track_library.is_id_used(track_id) or track_id in batch_ids  # Taken in the library or the batch
+        number = 1  # Search for free IDs from the start
+        for file_name in sorted(library):  # Loop through the tracks in a stable order
+            info = changes.get(file_name) or library[file_name]  # Latest data for the track
+            if info.get("id"):  # Skip tracks that have an ID
+                continue
+            number = next_free_id(is_used, number)  # Find a free ID
+            info = dict(info)  # Copy the track data
+            info["id"] = f"{number:02d}"  # Set the ID, zero padded like the existing ones
+            batch_ids[info["id"]] = file_name  # Reserve it
+            changes[file_name] = info  # Queue the change
+            assigned += 1  # Count the ID
+
+    track_library.set_tracks(changes)  # Save everything in one write
+    print(f"Read {probed} files, applied {updated} CSV rows, assigned {assigned} IDs, "
+          f"saved {len(changes)} tracks in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":  # If running as main program
+    main()  # Run the bulk import
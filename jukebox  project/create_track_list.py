@@ -1,22 +1,31 @@
 import tkinter as tk  # Import tkinter for GUI
 import pygame  # Import pygame for audio stuffs
-from track_library import library, list_tracks, save_library  # Import custom library functions
+from track_library import library, list_tracks, find_track, record_play, flush_journal, add_listener  # Import custom library functions
+from track_search import TrackSearch  # Import the title and artist search index
+from playback import PlaybackEngine, PLAYING, PAUSED  # Import the gapless playback engine and its states
+import metrics  # Import the timing helpers
 import os  # Importing os module to interact with the operating system
+import threading  # Importing threading to build the search index off the Tk thread
 
 class CreateTrackList:  
-    def __init__(self, window):  # Initialize with the window parameter
-        self.window = window  # Set the window for GUI
-        self.window.title("Create Track List")  # Set window title
-        self.window.geometry("900x600")  # Set window size
-        
-        pygame.init()  # Initialize pygame
-        pygame.mixer.init()  # Initialize pygame mixer for audio
+    def __init__(self, window, on_back=None):  # Initialize with the window parameter
+        self.window = window  # Set the window (or frame) for GUI
+        self.on_back = on_back  # Function that shows the previous screen
+        self.show()  # Set window title and size
+
+        if not pygame.mixer.get_init():  # If pygame has not been set up yet in this process
+            pygame.init()  # Initialize pygame
+            pygame.mixer.init()  # Initialize pygame mixer for audio
 
         self.playlist = []  # Initialize empty playlist
         self.current_track_index = -1  # Set initial track index to -1
         self.is_playing = False  # Set initial play status to False
         self.track_length = 0  # Initialize track length
         self.current_time = 0  # Initialize current time of track
+        self.engine = PlaybackEngine(self.playlist, on_track_start=self.track_started)  # Engine that plays the playlist
+        self.timer_job = None  # Scheduled timer update, only while playing
+        self.shown_second = None  # Second shown on the timer label
+        self.shown_pixel = None  # Pixel the progress marker is drawn at
 
         self.go_back_btn = tk.Button(window, text="Go Back", command=self.go_back)  # Create Go Back button
         self.go_back_btn.place(relx=0.95, rely=0.02, anchor="ne")  # Place Go Back button on screen
@@ -31,6 +40,26 @@ class CreateTrackList:
         self.add_btn = tk.Button(window, text="Add to Playlist", command=self.add_to_playlist)  # Add button
         self.add_btn.pack(pady=5)  # Place Add button
 
+        tk.Label(window, text="Search by Song Name or Artist:").pack(pady=5)  # Label to prompt search input
+
+        self.search = None  # Search index, set once the background build is done
+        self.changed_tracks = set()  # Tracks changed since the index was last brought up to date
+        add_listener(self.changed_tracks.add)  # Hear about every change, including ones from the folder watcher
+        tracks = list(library.items())  # Copy the tracks so the build does not see the library change under it
+        threading.Thread(target=self.build_search, args=(tracks,), daemon=True).start()  # Index every track off the Tk thread
+        self.search_job = None  # Pending delayed search, if any
+        self.search_results = []  # File names shown in the results list
+
+        self.search_var = tk.StringVar()  # Create a StringVar for tracking search input
+        self.search_var.trace_add("write", self.schedule_search)  # Search a moment after typing stops
+        self.search_entry = tk.Entry(window, textvariable=self.search_var, width=50)  # Create input field for search
+        self.search_entry.pack(pady=5)  # Place search input field
+
+        self.results_list = tk.Listbox(window, height=5, width=100)  # List of matching tracks
+        self.results_list.pack(pady=5)  # Place results list
+        self.results_list.bind("<Double-Button-1>", self.add_search_result)  # Double click adds the track
+        self.results_list.bind("<Return>", self.add_search_result)  # Enter adds the track
+
         self.clear_btn = tk.Button(window, text="Clear Playlist", command=self.clear_playlist)  # Clear button
         self.clear_btn.pack(pady=5)  # Place Clear button
 
@@ -54,6 +83,7 @@ class CreateTrackList:
         self.progress_bar = tk.Canvas(self.progress_frame, width=400, height=10, bg="white")  # Canvas for progress bar
         self.progress_bar.pack(side="left")  # Place progress bar
         self.progress_marker = self.progress_bar.create_line(0, 0, 0, 10, fill="red", width=3)  # Red marker for progress
+        self.progress_bar.bind("<Button-1>", self.seek)  # Click the progress bar to jump there
         
 
         self.track_length_label = tk.Label(self.controls_frame, text="00:00")  # Label for total track length
@@ -68,7 +98,9 @@ class CreateTrackList:
         self.next_btn = tk.Button(self.controls_frame, text="Next", command=self.next_track)  # Next button
         self.next_btn.grid(row=1, column=2, pady=10)  # Place Next button
 
-        self.update_timer()  # Start updating timer
+    def show(self):  # Function to set up the window each time the screen is shown
+        self.window.winfo_toplevel().title("Create Track List")  # Set window title
+        self.window.winfo_toplevel().geometry("900x780")  # Set window size
 
     def validate_id_input(self, *args):  # Function to validate ID input
         current_input = self.id_var.get()  # Get current input
@@ -78,21 +110,59 @@ class CreateTrackList:
     def add_to_playlist(self):  # Function to add track to playlist
         track_id = self.id_entry.get().strip()  # Get track ID from input field
         self.notification_label.config(text="")  # Clear notification
-        for track, info in library.items():  # Iterate through library
-            if info['id'] == track_id:  # If track ID matches
-                self.playlist.append((track, info))  # Add track to playlist
-                self.update_playlist_display()  # Update playlist display
-                return
+        track = find_track(track_id)  # Look up the track by ID
+        if track is not None:  # If track ID matches
+            self.playlist.append((track, library[track]))  # Add track to playlist
+            self.update_playlist_display()  # Update playlist display
+            self.engine.playlist_changed()  # The next track may have changed
+            return
         self.notification_label.config(text="ID not found. Please enter a valid ID.")  # Invalid ID message
 
+    def schedule_search(self, *args):  # Function to search once typing pauses
+        if self.search_job is not None:  # If a search is already waiting
+            self.window.after_cancel(self.search_job)  # Replace it with a later one
+        self.search_job = self.window.after(150, self.run_search)  # Search 150ms after the last keypress
+
+    def build_search(self, tracks):  # Function run on the background thread to index every track
+        search = TrackSearch()  # Create the search index
+        search.build(dict(tracks))  # Index every track once
+        self.search = search  # Hand the finished index to the Tk thread
+
+    @metrics.timed("run_search")
+    def run_search(self):  # Function to show the tracks matching the search box
+        self.search_job = None  # The delayed search is running now
+        if self.search is None:  # If the index is still being built
+            self.search_job = self.window.after(100, self.run_search)  # Try again shortly
+            return
+        while self.changed_tracks:  # Bring the index up to date first
+            track = self.changed_tracks.pop()  # Get a changed track
+            self.search.update_track(track, library.get(track))  # Re-index it
+        self.search_results = self.search.search(self.search_var.get())  # Find matching file names
+        self.results_list.delete(0, tk.END)  # Clear the old results
+        for track in self.search_results:  # Loop through the matches
+            info = library[track]  # Get the track data
+            artist = info.get("artist") or "Unknown Artist"  # Get artist name
+            self.results_list.insert(tk.END, f"{info['id']} {os.path.splitext(track)[0]} by {artist}")  # Show the match
+
+    def add_search_result(self, event=None):  # Function to add the chosen search result to the playlist
+        self.notification_label.config(text="")  # Clear notification
+        selection = self.results_list.curselection()  # Get the chosen result
+        if not selection:  # If nothing is chosen
+            return
+        track = self.search_results[selection[0]]  # Get the file name
+        self.playlist.append((track, library[track]))  # Add track to playlist
+        self.update_playlist_display()  # Update playlist display
+        self.engine.playlist_changed()  # The next track may have changed
+
     def clear_playlist(self):  # Function to clear playlist
-        self.playlist = []  # Reset playlist
+        self.playlist.clear()  # Reset playlist, the engine shares the list
         self.update_playlist_display()  # Update playlist display
+        self.engine.stop()  # Stop music and drop the queued track
         if self.is_playing:  # If currently playing
-            pygame.mixer.music.stop()  # Stop music
             self.is_playing = False  # Set playing status to False
             self.pause_play_btn.config(text="Play")  # Change button text to Play
 
+    @metrics.timed("update_playlist_display")
     def update_playlist_display(self):  # Function to update playlist display
         self.playlist_text.config(state="normal")  # Enable text widget
         self.playlist_text.delete(1.0, tk.END)  # Clear existing playlist display
@@ -110,24 +180,29 @@ class CreateTrackList:
         self.current_track_index = 0  # Start from the first track
         self.play_track(self.current_track_index)  # Play first track
 
+    @metrics.timed("play_track")
     def play_track(self, index):  # Function to play a specific track
         if index < 0 or index >= len(self.playlist):  # Check if index is valid
             return
-        track_path = os.path.join("Tracks", self.playlist[index][0])  # Get track path
-        if os.path.exists(track_path):  # If track file exists
-            pygame.mixer.music.load(track_path)  # Load track
-            pygame.mixer.music.play()  # Play track
-            self.track_length = pygame.mixer.Sound(track_path).get_length()  # Get track length
+        if self.engine.play(index):  # If the track file exists and started playing
             self.is_playing = True  # Set play status to True
-            self.increment_play_count(self.playlist[index][0])  # Increment play count
-
+            self.pause_play_btn.config(text="Pause")  # Change button text to Pause
+            self.start_timer()  # Update the timer while the track plays
         else:
             self.notification_label.config(text="Track file not found!")  # Display error if file not found
 
+    def track_started(self, index):  # Function called by the engine whenever a track starts, queued ones included
+        self.current_track_index = index  # Follow the engine to the new track
+        self.track_length = self.engine.track_length  # Get track length from the MP3 headers
+        total_minutes, total_seconds = divmod(int(self.track_length), 60)  # Get total track length
+        self.track_length_label.config(text=f"{total_minutes:02}:{total_seconds:02}")  # Update track length label once per track
+        self.shown_second = None  # Make the next timer update draw the new track
+        self.shown_pixel = None  # Make the next timer update draw the new track
+        self.increment_play_count(self.playlist[index][0])  # Increment play count
+
     def increment_play_count(self, track_name):  # Function to increment play count
         if track_name in library:  # If track is in library
-            library[track_name]['play_count'] = library[track_name].get('play_count', 0) + 1  # Increment play count
-            save_library()  # Save updated library
+            record_play(track_name)  # Increment play count and queue it for saving
 
     def back(self):  # Function to play the previous track
         if self.current_track_index > 0:  # If not at the first track
@@ -135,14 +210,17 @@ class CreateTrackList:
             self.play_track(self.current_track_index)  # Play previous track
 
     def pause_or_play(self):  # Function to toggle between pause and play
-        if self.is_playing:  # If currently playing
-            pygame.mixer.music.pause()  # Pause music
+        if self.engine.state == PLAYING:  # If currently playing
+            self.engine.pause()  # Pause music
             self.is_playing = False  # Set play status to False
             self.pause_play_btn.config(text="Play")  # Change button text to Play
-        else:
-            pygame.mixer.music.unpause()  # Unpause music
+        elif self.engine.state == PAUSED:  # If a track is paused
+            self.engine.resume()  # Unpause music
             self.is_playing = True  # Set play status to True
             self.pause_play_btn.config(text="Pause")  # Change button text to Pause
+            self.start_timer()  # Update the timer while the track plays
+        elif self.playlist:  # If playback stopped, start again from the current track
+            self.play_track(max(self.current_track_index, 0))  # Play the track
 
     def next_track(self):  # Function to play the next track
         if self.current_track_index < len(self.playlist) - 1:  # If not the last track
@@ -152,29 +230,55 @@ class CreateTrackList:
             self.current_track_index = 0  # Loop back to first track
             self.play_track(self.current_track_index)  # Play first track
 
+    def start_timer(self):  # Function to start updating the timer if it is not running
+        if self.timer_job is None:  # If no update is scheduled
+            self.update_timer()  # Update now, it schedules the next update itself
+
+    @metrics.timed("update_timer")
     def update_timer(self):  # Function to update the timer
-        if self.is_playing:  # If currently playing
-            self.current_time = pygame.mixer.music.get_pos() // 1000  # Get current time in seconds
+        self.timer_job = None  # This update is running now
+        self.engine.poll()  # Queue the next track and follow the engine onto it when the current one ends
+        if self.engine.state != PLAYING:  # If paused or stopped there is nothing to update
+            if self.is_playing:  # If playback ended on its own
+                self.is_playing = False  # Set play status to False
+                self.pause_play_btn.config(text="Play")  # Change button text to Play
+            return  # Stop updating until playback starts again
+        position = self.engine.position()  # Get current position in seconds
+        self.current_time = int(position)  # Get current time in seconds
+        if self.current_time != self.shown_second:  # Only touch the label when the second changes
             minutes, seconds = divmod(self.current_time, 60)  # Convert to minutes and seconds
-            total_minutes, total_seconds = divmod(self.track_length, 60)  # Get total track length
             self.timer_label.config(text=f"{minutes:02}:{seconds:02}")  # Update current time label
-            self.track_length_label.config(text=f"{int(total_minutes):02}:{int(total_seconds):02}")  # Update track length label
-            progress_ratio = self.current_time / self.track_length if self.track_length else 0  # Calculate progress ratio
-            self.progress_bar.coords(self.progress_marker, 400 * progress_ratio, 0, 400 * progress_ratio, 10)  # Update progress bar
-        self.window.after(500, self.update_timer)  # Update timer every 500ms
+            self.shown_second = self.current_time  # Remember what is shown
+        pixel = int(400 * min(position / self.track_length, 1)) if self.track_length else 0  # Calculate progress marker position
+        if pixel != self.shown_pixel:  # Only move the marker when it moves by a pixel
+            self.progress_bar.coords(self.progress_marker, pixel, 0, pixel, 10)  # Update progress bar
+            self.shown_pixel = pixel  # Remember what is drawn
+        wait = self.current_time + 1 - position  # Seconds until the label changes
+        if self.track_length:  # If the length is known
+            wait = min(wait, (pixel + 1) * self.track_length / 400 - position)  # Seconds until the marker moves
+        self.timer_job = self.window.after(max(50, int(wait * 1000) + 10), self.update_timer)  # Wake up just after the next change
+
+    def seek(self, event):  # Function to jump to the clicked position in the track
+        if self.track_length:  # If the length is known
+            self.engine.seek(self.track_length * event.x / 400)  # Restart the track at that position
+            self.shown_second = None  # Redraw the timer at the new position
+            self.shown_pixel = None  # Redraw the marker at the new position
+            if self.engine.state == PLAYING:  # If the track is playing
+                self.start_timer()  # Make sure the timer is running
 
-    
 
     def go_back(self):  # Function to go back to the previous screen
         if self.is_playing:  # If currently playing
-            pygame.mixer.music.stop()  # Stop music
+            self.engine.stop()  # Stop music
             self.is_playing = False  # Set play status to False
             self.pause_play_btn.config(text="Play")  # Change button text to Play
-        self.window.destroy()  # Close current window
-        os.system("python track_player.py")  # Launch track_player.py script
+        flush_journal()  # Save pending changes
+        if self.on_back is not None:  # If this screen was opened from the menu
+            self.on_back()  # Show the menu again
+        else:
+            self.window.destroy()  # Close current window
 
 if __name__ == "__main__":  # If running as main program
-    root = tk.Tk()  # Create a Tkinter window
-    app = CreateTrackList(root)  # Initialize the CreateTrackList app
-    root.mainloop()  # Start Tkinter event loop
+    import track_player  # Import the menu only when running on our own
+    track_player.main("create_track_list")  # Run the jukebox starting on this screen
 
@@ -0,0 +1,110 @@
+import atexit  # Importing atexit to export the metrics when the program ends
+import csv  # Importing csv for the CSV export
+import functools  # Importing functools to keep the names of timed functions
+import json  # Importing the json module for the JSON export
+import logging  # Importing logging for the logger export
+import os  # Importing the os module to read the environment variable
+import threading  # Importing threading because the flush timer and watcher record metrics too
+import time  # Importing time for the timers
+
+target = os.environ.get("JUKEBOX_METRICS", "")  # Where to export: a .json or .csv file, "log", or empty to turn metrics off
+enabled = bool(target)  # Metrics are only collected when a target is set
+spans = {}  # Maps a span name to [count, total seconds, longest seconds]
+counters = {}  # Maps a counter name to its value
+lock = threading.Lock()  # Guards the totals against other threads
+logger = logging.getLogger("jukebox.metrics")  # Logger used by the "log" target
+
+
+def record_span(name, seconds):  # Function to add one timing to a span
+    with lock:  # Keep other threads out while adding
+        totals = spans.get(name)  # Get the totals so far
+        if totals is None:  # If this is the first timing
+            spans[name] = [1, seconds, seconds]  # Start the totals
+        else:
+            totals[0] += 1  # Count the timing
+            totals[1] += seconds  # Add up the time
+            totals[2] = max(totals[2], seconds)  # Keep the longest
+
+
+def count(name, amount=1):  # Function to add to a counter
+    if enabled:  # Only when metrics are on
+        with lock:  # Keep other threads out while adding
+            counters[name] = counters.get(name, 0) + amount  # Add to the counter
+
+
+def timed(name):  # Decorator to time every call of a function under a span name
+    def decorate(function):  # The decorator itself
+        if not enabled:  # When metrics are off
+            return function  # Leave the function untouched, so there is no cost at all
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):  # The function with a timer around it
+            start = time.perf_counter()  # Start the clock
+            try:
+                return function(*args, **kwargs)  # Run the function
+            finally:
+                record_span(name, time.perf_counter() - start)  # Record the time, even if it failed
+        return wrapper
+    return decorate
+
+
+class Span:  # Context manager timing a block of code under a span name
+    def __init__(self, name):  # Initialize with the span name
+        self.name = name  # Name to record the time under
+
+    def __enter__(self):  # Called when the block starts
+        self.start = time.perf_counter()  # Start the clock
+        return self
+
+    def __exit__(self, *exc):  # Called when the block ends
+        record_span(self.name, time.perf_counter() - self.start)  # Record the time
+
+
+class NoSpan:  # Context manager that does nothing, used when metrics are off
+    def __enter__(self):  # Called when the block starts
+        return self
+
+    def __exit__(self, *exc):  # Called when the block ends
+        pass
+
+
+NO_SPAN = NoSpan()  # Shared so turned off spans cost no allocation
+
+
+def span(name):  # Function to time a block of code: with metrics.span("name"): ...
+    return Span(name) if enabled else NO_SPAN  # Only time it when metrics are on
+
+
+def snapshot():  # Function to get every metric as plain data
+    with lock:  # Keep other threads out while copying
+        return {
+            "spans": {name: {"count": n, "total": total, "mean": total / n, "max": longest} for name, (n, total, longest) in spans.items()},
+            "counters": dict(counters),
+        }
+
+
+def export(destination=None):  # Function to write every metric to a JSON or CSV file, or to the logger
+    destination = destination or target  # Default to the environment variable
+    data = snapshot()  # Get every metric
+    if destination == "log":  # If the logger was asked for
+        if not logger.handlers:  # If nothing set up the logger, the root logger would drop info records
+            logger.addHandler(logging.StreamHandler())  # Print the records on stderr
+            logger.setLevel(logging.INFO)  # Let the info records through
+        for name, values in sorted(data["spans"].items()):  # Loop through the spans
+            logger.info("span %s count=%d total=%.6fs mean=%.6fs max=%.6fs", name, values["count"], values["total"], values["mean"], values["max"])
+        for name, value in sorted(data["counters"].items()):  # Loop through the counters
+            logger.info("counter %s=%s", name, value)
+    elif destination.endswith(".csv"):  # If a CSV file was asked for
+        with open(destination, "w", newline="") as f:  # Open the file in write mode
+            writer = csv.writer(f)  # One row per metric
+            writer.writerow(["kind", "name", "count", "total", "mean", "max", "value"])  # Header row
+            for name, values in sorted(data["spans"].items()):  # Loop through the spans
+                writer.writerow(["span", name, values["count"], values["total"], values["mean"], values["max"], ""])
+            for name, value in sorted(data["counters"].items()):  # Loop through the counters
+                writer.writerow(["counter", name, "", "", "", "", value])
+    else:  # Anything else is a JSON file
+        with open(destination, "w") as f:  # Open the file in write mode
+            json.dump(data, f, indent=4)  # Write the metrics
+
+
+if enabled:  # Only when metrics are on
+    atexit.register(export)  # Export them when the program ends
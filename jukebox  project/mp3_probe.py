@@ -0,0 +1,163 @@
+import os  # Importing the os module to get file sizes
+import struct  # Importing struct to read big endian numbers from headers
+
+BITRATES = {  # Bitrates in kbps, by (MPEG version 1 or 2, layer)
+    (1, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (1, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (1, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (2, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (2, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (2, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+SAMPLE_RATES = {1: [44100, 48000, 32000], 2: [22050, 24000, 16000], 2.5: [11025, 12000, 8000]}  # Sample rates in Hz by MPEG version
+VERSIONS = {0: 2.5, 2: 2, 3: 1}  # MPEG version by the two version bits (1 is reserved)
+LAYERS = {1: 3, 2: 2, 3: 1}  # Layer by the two layer bits (0 is reserved)
+SCAN_SIZE = 64 * 1024  # Bytes to search for the first frame after the ID3 tag
+
+
+def skip_id3v2(f):  # Function to find where the audio starts after an ID3v2 tag
+    header = f.read(10)  # Read the possible tag header
+    if len(header) < 10 or header[:3] != b"ID3":  # If there is no ID3v2 tag
+        return 0  # The audio starts at the beginning
+    size = 0  # The tag size is stored as four 7-bit bytes
+    for byte in header[6:10]:  # Loop through the size bytes
+        size = (size << 7) | (byte & 0x7F)  # Add the next 7 bits
+    if header[5] & 0x10:  # If the tag has a footer
+        size += 10  # Skip the footer too
+    return 10 + size  # The audio starts after the header and the tag
+
+
+def parse_header(data, pos):  # Function to decode a frame header, or return None if it is not one
+    if pos + 4 > len(data) or data[pos] != 0xFF or data[pos + 1] & 0xE0 != 0xE0:  # Check the frame sync bits
+        return None
+    b1, b2, b3 = data[pos + 1], data[pos + 2], data[pos + 3]  # The bytes after the sync
+    version = VERSIONS.get((b1 >> 3) & 0x03)  # MPEG version
+    layer = LAYERS.get((b1 >> 1) & 0x03)  # MPEG layer
+    bitrate_index = b2 >> 4  # Index into the bitrate table
+    rate_index = (b2 >> 2) & 0x03  # Index into the sample rate table
+    if version is None or layer is None or bitrate_index in (0, 15) or rate_index == 3:  # Reserved or free format values
+        return None
+    bitrate = BITRATES[(1 if version == 1 else 2, layer)][bitrate_index] * 1000  # Bitrate in bits per second
+    sample_rate = SAMPLE_RATES[version][rate_index]  # Sample rate in Hz
+    padding = (b2 >> 1) & 0x01  # One extra slot in this frame
+    if layer == 1:  # Layer I frames are counted in 4 byte slots
+        samples = 384  # Samples per frame
+        length = (12 * bitrate // sample_rate + padding) * 4  # Frame length in bytes
+    else:
+        samples = 1152 if version == 1 or layer == 2 else 576  # Samples per frame
+        length = samples // 8 * bitrate // sample_rate + padding  # Frame length in bytes
+    return {
+        "version": version,
+        "layer": layer,
+        "bitrate": bitrate,
+        "sample_rate": sample_rate,
+        "samples": samples,
+        "length": length,
+        "mono": b3 >> 6 == 3,
+    }
+
+
+def find_first_frame(data):  # Function to find the first real frame header in a block of bytes
+    pos = data.find(b"\xff")  # Jump straight to the next possible sync byte
+    while pos != -1:  # Until there are no more candidates
+        frame = parse_header(data, pos)  # Try to decode a header here
+        if frame is not None:  # If it looks like a header
+            following = pos + frame["length"]  # Where the next frame should start
+            if following + 4 > len(data) or parse_header(data, following) is not None:  # Confirm with the next frame
+                return pos, frame  # Found the first frame
+        pos = data.find(b"\xff", pos + 1)  # Try the next sync byte
+    return None, None  # No frame found
+
+
+def count_frames(data, pos, frame):  # Function to read the frame count from a Xing/Info or VBRI header
+    if frame["version"] == 1:  # MPEG 1 side info size
+        side_info = 17 if frame["mono"] else 32
+    else:  # MPEG 2 and 2.5 side info size
+        side_info = 9 if frame["mono"] else 17
+    xing = pos + 4 + side_info  # The Xing/Info tag sits right after the side info
+    if data[xing:xing + 4] in (b"Xing", b"Info") and len(data) >= xing + 8:  # If the encoder wrote a whole Xing/Info tag
+        flags = struct.unpack(">I", data[xing + 4:xing + 8])[0]  # Which fields follow
+        if flags & 0x01 and len(data) >= xing + 12:  # If the frame count is present
+            return struct.unpack(">I", data[xing + 8:xing + 12])[0]  # Return the frame count
+    vbri = pos + 4 + 32  # The VBRI tag always sits 32 bytes after the header
+    if data[vbri:vbri + 4] == b"VBRI" and len(data) >= vbri + 18:  # If the encoder wrote a whole VBRI tag
+        return struct.unpack(">I", data[vbri + 14:vbri + 18])[0]  # Return the frame count
+    return None  # No frame count available, or the tag is cut short
+
+
+def probe_duration(path):  # Function to get the length of an MP3 in seconds without decoding it
+    size = os.path.getsize(path)  # Get the file size
+    with open(path, "rb") as f:  # Open the file in binary mode
+        start = skip_id3v2(f)  # Skip the ID3v2 tag
+        f.seek(start)  # Go to the audio
+        data = f.read(SCAN_SIZE)  # Read enough to find the first frame and its VBR tag
+        if size >= 128:  # If the file is big enough for an ID3v1 tag
+            f.seek(-128, os.SEEK_END)  # Go to where the tag would be
+            if f.read(3) == b"TAG":  # If there is an ID3v1 tag
+                size -= 128  # It is not audio
+    pos, frame = find_first_frame(data)  # Find the first frame
+    if frame is None:  # If this does not look like an MP3
+        return None
+    frames = count_frames(data, pos, frame)  # Try the VBR frame count
+    if frames:  # If the encoder stored the frame count
+        return frames * frame["samples"] / frame["sample_rate"]  # Exact length
+    return (size - start - pos) * 8 / frame["bitrate"]  # Constant bitrate: audio bytes over byte rate
+
+
+def decode_text(data):  # Function to decode the text of an ID3v2 text frame
+    encoding = data[:1]  # The first byte says how the text is encoded
+    if encoding == b"\x01":  # UTF-16 with a byte order mark
+        text = data[1:].decode("utf-16", "replace")
+    elif encoding == b"\x02":  # UTF-16 big endian without a byte order mark
+        text = data[1:].decode("utf-16-be", "replace")
+    elif encoding == b"\x03":  # UTF-8
+        text = data[1:].decode("utf-8", "replace")
+    else:  # Latin-1
+        text = data[1:].decode("latin-1")
+    return text.split("\x00")[0].strip()  # Keep the first value, without padding
+
+
+def read_id3v2(f, wanted):  # Function to read text frames from an ID3v2 tag
+    header = f.read(10)  # Read the tag header
+    if len(header) < 10 or header[:3] != b"ID3":  # If there is no ID3v2 tag
+        return {}
+    major = header[3]  # Tag version: 2, 3 or 4
+    size = 0  # The tag size is stored as four 7-bit bytes
+    for byte in header[6:10]:  # Loop through the size bytes
+        size = (size << 7) | (byte & 0x7F)  # Add the next 7 bits
+    data = f.read(size)  # Read the whole tag
+    pos = 0  # Position in the tag
+    if header[5] & 0x40 and major >= 3:  # If there is an extended header
+        ext_size = struct.unpack(">I", data[:4])[0]  # Its size
+        pos = ext_size if major == 4 else ext_size + 4  # Version 4 counts the size bytes, version 3 does not
+    found = {}  # Frames found so far
+    id_size, header_size = (3, 6) if major == 2 else (4, 10)  # Version 2 has short frame headers
+    while pos + header_size <= len(data) and data[pos] != 0:  # Until the padding or the end of the tag
+        frame_id = data[pos:pos + id_size].decode("latin-1")  # Frame name, like TPE1
+        raw_size = data[pos + id_size:pos + id_size * 2]  # Frame size bytes
+        if major == 2:  # Three byte size
+            frame_size = int.from_bytes(raw_size, "big")
+        elif major == 4:  # Four 7-bit bytes
+            frame_size = 0
+            for byte in raw_size:  # Loop through the size bytes
+                frame_size = (frame_size << 7) | (byte & 0x7F)  # Add the next 7 bits
+        else:  # Four byte size
+            frame_size = int.from_bytes(raw_size, "big")
+        body = data[pos + header_size:pos + header_size + frame_size]  # Frame contents
+        if frame_id in wanted:  # If this is a frame we want
+            found[wanted[frame_id]] = decode_text(body)  # Decode it
+        pos += header_size + frame_size  # Go to the next frame
+    return found  # Return the frames found
+
+
+def read_tags(path):  # Function to read the title and artist of an MP3 from its ID3 tags
+    with open(path, "rb") as f:  # Open the file in binary mode
+        tags = read_id3v2(f, {"TIT2": "title", "TPE1": "artist", "TT2": "title", "TP1": "artist"})  # Try the ID3v2 tag first
+        if "title" not in tags or "artist" not in tags:  # If something is missing
+            if os.path.getsize(path) >= 128:  # If the file is big enough for an ID3v1 tag
+                f.seek(-128, os.SEEK_END)  # Go to where the tag would be
+                v1 = f.read(128)  # Read it
+                if v1[:3] == b"TAG":  # If there is an ID3v1 tag
+                    tags.setdefault("title", v1[3:33].split(b"\x00")[0].decode("latin-1").strip())  # 30 byte title
+                    tags.setdefault("artist", v1[33:63].split(b"\x00")[0].decode("latin-1").strip())  # 30 byte artist
+    return {key: value for key, value in tags.items() if value}  # Drop empty tags
@@ -0,0 +1,135 @@
+import os  # Import os to build and check track paths
+import threading  # Import threading to look up the next track off the Tk thread
+import pygame  # Import pygame for audio stuffs
+import metrics  # Import the timing helpers
+from track_library import track_folder, track_duration  # Import the track folder and cached track lengths
+
+TRACK_END = pygame.USEREVENT + 1  # Event pygame posts each time a track finishes
+STOPPED = "stopped"  # Nothing is loaded, or the playlist ran into a missing file
+PLAYING = "playing"  # A track is playing
+PAUSED = "paused"  # A track is loaded but paused
+
+
+def decode_length(path):  # Function to get the length of a file the MP3 headers could not give, by decoding it
+    try:
+        return pygame.mixer.Sound(path).get_length()  # Decode the whole file, slow but works for any format pygame reads
+    except pygame.error:  # Not a file pygame can decode either
+        return None
+
+
+class PlaybackEngine:  # Plays a playlist, queueing the next track so there is no gap between tracks
+    def __init__(self, playlist, on_track_start=None):  # Initialize with the playlist to play
+        self.playlist = playlist  # List of (file name, info) pairs, shared with the screen
+        self.on_track_start = on_track_start  # Function called with the index of each track that starts
+        self.index = -1  # Index of the track playing
+        self.state = STOPPED  # One of STOPPED, PLAYING or PAUSED
+        self.track_length = 0  # Length of the track playing in seconds
+        self.offset = 0  # Seconds into the track where the mixer position started counting
+        self.preloaded = None  # (index, path, length) of the next track, once looked up
+        self.queued = None  # (index, path, length) handed to the mixer queue
+        self.generation = 0  # Bumped on every jump so stale lookups are ignored
+        pygame.mixer.music.set_endevent(TRACK_END)  # Ask pygame to tell us when a track finishes
+
+    def next_index(self, index):  # Function to get the track after an index
+        return index + 1 if index < len(self.playlist) - 1 else 0  # Loop back to first track
+
+    def play(self, index):  # Function to start playing a track straight away
+        if self.preloaded is not None and self.preloaded[0] == index:  # If the track was already looked up
+            path, length = self.preloaded[1], self.preloaded[2]  # Use the lookup
+        else:
+            path = os.path.join(track_folder, self.playlist[index][0])  # Get track path
+            try:
+                with metrics.span("play_track.duration"):  # Time the length lookup
+                    length = track_duration(self.playlist[index][0], decode_length)  # Get track length from the cache or the MP3 headers
+            except OSError:  # If the track file does not exist
+                return False
+        try:
+            with metrics.span("play_track.load"):  # Time loading the file into the mixer
+                pygame.mixer.music.load(path)  # Load track
+                pygame.mixer.music.play()  # Play track
+        except (OSError, pygame.error):  # If the file went away after it was looked up
+            return False
+        pygame.event.clear(TRACK_END)  # Stopping the old track posted an end event, it is not a real track end
+        self.offset = 0  # The mixer position restarts with play()
+        self.queued = None  # play() drops anything that was queued
+        self.state = PLAYING  # A track is playing
+        self.track_started(index, length)  # Start the track
+        return True
+
+    def pause(self):  # Function to pause the track playing
+        if self.state == PLAYING:  # Only a playing track can be paused
+            pygame.mixer.music.pause()  # Pause music, get_pos stops counting too
+            self.state = PAUSED  # Remember it is paused
+
+    def resume(self):  # Function to carry on with a paused track
+        if self.state == PAUSED:  # Only a paused track can be resumed
+            pygame.mixer.music.unpause()  # Unpause music
+            self.state = PLAYING  # Remember it is playing
+
+    def seek(self, seconds):  # Function to jump to a position in the track playing
+        if self.state == STOPPED:  # Nothing to seek in
+            return
+        seconds = max(0, min(seconds, self.track_length))  # Stay inside the track
+        pygame.mixer.music.play(start=seconds)  # Restart the track at that position
+        pygame.event.clear(TRACK_END)  # Restarting can post an end event, it is not a real track end
+        if self.state == PAUSED:  # If the track was paused
+            pygame.mixer.music.pause()  # Keep it paused at the new position
+        self.offset = seconds  # get_pos restarts at zero from here
+        self.queued = None  # Queue the next track again in case the restart dropped it
+
+    def stop(self):  # Function to stop playing and forget the queued track
+        pygame.mixer.music.stop()  # Stop music
+        pygame.event.clear(TRACK_END)  # Stopping posts an end event, it is not a real track end
+        self.generation += 1  # Ignore lookups still running
+        self.preloaded = None  # Forget the next track
+        self.queued = None  # Nothing is queued after a stop
+        self.index = -1  # Nothing is playing
+        self.state = STOPPED  # Nothing is loaded
+
+    def track_started(self, index, length):  # Function to record a new track and look up the one after it
+        self.index = index  # Remember the track playing
+        self.track_length = length  # Remember its length
+        if self.on_track_start is not None:  # If the screen wants to know
+            self.on_track_start(index)  # Tell it which track started
+        self.preload()  # Get the next track ready
+
+    def preload(self):  # Function to look up the next track on a background thread
+        self.generation += 1  # Any older lookup is now stale
+        self.preloaded = None  # Forget the old lookup
+        if not self.playlist:  # If there is nothing to play
+            return
+        index = self.next_index(self.index)  # The track to get ready
+        threading.Thread(target=self.resolve, args=(index, self.playlist[index][0], self.generation), daemon=True).start()  # Stat and probe off the Tk thread
+
+    def resolve(self, index, file_name, generation):  # Function run on the background thread
+        path = os.path.join(track_folder, file_name)  # Get track path
+        try:
+            with metrics.span("preload.duration"):  # Time the length lookup
+                length = track_duration(file_name, decode_length)  # Get track length from the cache or the MP3 headers
+        except OSError:  # If the track file does not exist
+            return  # Leave it for play() to report when it is reached
+        if generation == self.generation:  # If no jump happened meanwhile
+            self.preloaded = (index, path, length)  # Hand the result to the Tk thread
+
+    def playlist_changed(self):  # Function to call when tracks are added to the playlist
+        if self.index >= 0:  # If something is playing
+            self.preload()  # The next track may be different now
+
+    def position(self):  # Function to get the position in the track playing, in seconds
+        return self.offset + max(0, pygame.mixer.music.get_pos()) / 1000  # get_pos is -1 when nothing is playing
+
+    def poll(self):  # Function to run from the Tk thread while playing: queue the next track and follow track changes
+        if self.preloaded is not None and self.preloaded is not self.queued and self.state != STOPPED:  # If the next track is ready
+            self.queued = self.preloaded  # Remember what the mixer will play next
+            pygame.mixer.music.queue(self.queued[1])  # Queue it so it starts without a gap, replacing any older queued track
+        for event in pygame.event.get(TRACK_END):  # Loop through the finished tracks
+            if self.queued is not None:  # If the mixer moved on to the queued track
+                index, path, length = self.queued  # Get the track it moved on to
+                self.queued = None  # The queue is empty again
+                self.offset = 0  # pygame restarts the mixer position for a queued track
+                self.track_started(index, length)  # Start the track
+            elif self.state == PLAYING and self.playlist:  # If the queue was empty, for example the next file was missing
+                if not self.play(self.next_index(self.index)):  # Move on the slow way
+                    self.state = STOPPED  # The next file is missing too, so playback ends here
+            else:
+                self.state = STOPPED  # The last track ended with nothing to follow
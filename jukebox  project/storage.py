@@ -0,0 +1,219 @@
+import json  # Importing the json module to handle JSON data
+import os  # Importing the os module to interact with the operating system
+import re  # Importing re to skip whitespace in the streaming reader
+import sqlite3  # Importing sqlite3 for the database backend
+import metrics  # Importing the counter helpers
+from track_record import TrackRecord  # Importing the compact track record
+
+TRACK_COLUMNS = ("id", "artist", "rating", "play_count")  # Track fields stored in their own database columns
+WHITESPACE = re.compile(r"[ \t\n\r]*")  # Whitespace allowed between JSON tokens
+CHUNK_SIZE = 1 << 16  # Characters read at a time by the streaming reader
+
+
+def write_atomic(path, text):  # Function to replace a file without ever leaving it half written
+    temp_path = path + ".tmp"  # Write next to the target so the rename stays on one disk
+    with open(temp_path, "w") as f:  # Open the temporary file in write mode
+        f.write(text)  # Write the new contents
+        metrics.count("bytes_written", len(text))  # Count the bytes written
+        f.flush()  # Push the contents out of Python's buffer
+        os.fsync(f.fileno())  # Make sure the contents reached the disk
+    os.replace(temp_path, path)  # Swap the new file in with a single rename
+
+
+def iter_json_object(f):  # Function to yield the (key, value) pairs of a top level JSON object without reading it all at once
+    decoder = json.JSONDecoder()  # Decoder for one value at a time
+    buffer = ""  # Text read but not parsed yet
+    pos = 0  # Position of the next token in the buffer
+    at_end = False  # Set once the file is fully read
+
+    def read_more():  # Function to drop the parsed text and read the next chunk
+        nonlocal buffer, pos, at_end
+        chunk = f.read(CHUNK_SIZE)  # Read the next chunk
+        at_end = not chunk  # An empty read means the end of the file
+        buffer = buffer[pos:] + chunk  # Keep only what is not parsed yet
+        pos = 0  # The buffer starts at the next token again
+        return not at_end
+
+    def next_token():  # Function to skip whitespace and return the next character, or "" at the end
+        nonlocal pos
+        while True:
+            pos = WHITESPACE.match(buffer, pos).end()  # Skip whitespace
+            if pos < len(buffer) or not read_more():  # If a token is buffered or the file is done
+                return buffer[pos:pos + 1]
+
+    def next_value():  # Function to parse the next value, reading more text until it is complete
+        nonlocal pos
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, pos)  # Parse one value
+                if end < len(buffer) or at_end:  # A value ending at the buffer edge may be cut short, like a number
+                    pos = end  # Move past the value
+                    return value
+            except ValueError:  # The value is not complete yet
+                if at_end:  # Nothing more to read
+                    raise
+            read_more()  # Read more text and try again
+
+    if next_token() != "{":  # The data file is one object
+        raise ValueError("Expected a JSON object")
+    pos += 1  # Move past the brace
+    first = True  # No comma before the first pair
+    while True:
+        token = next_token()  # Look at the next token
+        if token == "}":  # End of the object
+            return
+        if not first:  # Every later pair follows a comma
+            if token != ",":  # Anything else is broken or cut short
+                raise ValueError("Expected ',' or '}' in JSON object")
+            pos += 1  # Move past it
+            next_token()  # Skip whitespace before the key
+        first = False  # The first pair is done
+        key = next_value()  # Parse the key
+        if next_token() != ":":  # A colon separates the key and the value
+            raise ValueError("Expected ':' in JSON object")
+        pos += 1  # Move past the colon
+        next_token()  # Skip whitespace before the value
+        yield key, next_value()  # Parse the value and hand over the pair
+
+
+class JsonStorage:  # Stores the library as a JSON snapshot plus an append-only journal of changes
+    def __init__(self, data_file, journal_file, compact_size):  # Initialize with the file names
+        self.data_file = data_file  # File where the snapshot is saved
+        self.journal_file = journal_file  # File where changes since the snapshot are appended
+        self.compact_size = compact_size  # Number of journal entries that triggers a snapshot rewrite
+        self.journal_length = 0  # Number of entries currently in the journal file
+
+    def load(self):  # Function to read the snapshot and replay the journal over it
+        data = {}  # Start with an empty library
+        if os.path.exists(self.data_file):  # Check if the data file exists
+            with open(self.data_file, "r") as f:  # Open the data file in read mode
+                for file_name, info in iter_json_object(f):  # Read one track at a time
+                    data[file_name] = TrackRecord.from_dict(info)  # Keep only the compact record
+        self.journal_length = 0  # Count the journal entries as they are replayed
+        if os.path.exists(self.journal_file):  # Check if there are changes newer than the snapshot
+            good = 0  # Bytes of complete entries read so far
+            torn = False  # Set if the journal ends in a half written entry
+            with open(self.journal_file, "rb") as f:  # Open the journal in binary mode so entries can be measured in bytes
+                for line in f:  # Replay each change in the order it was written
+                    try:
+                        if not line.endswith(b"\n"):  # An entry without its newline was cut short
+                            raise ValueError("Unfinished journal entry")
+                        entry = json.loads(line)  # Decode the change
+                    except ValueError:  # A crash can leave the last line half written
+                        torn = True
+                        break
+                    data[entry["file"]] = TrackRecord.from_dict(entry["info"])  # Apply the change
+                    self.journal_length += 1  # Count the replayed entry
+                    good += len(line)  # The entry is complete
+            if torn:  # If the last entry is broken
+                with open(self.journal_file, "r+b") as f:  # Open the journal for rewriting
+                    f.truncate(good)  # Drop the broken entry so new entries do not get appended onto it
+        return data  # Return the library data
+
+    def save(self, library):  # Function to write the whole library as a new snapshot
+        write_atomic(self.data_file, json.dumps(library, indent=4, default=dict))  # Write the snapshot, records as plain objects
+        if os.path.exists(self.journal_file):  # If there is an old journal
+            os.remove(self.journal_file)  # The snapshot replaces it
+        self.journal_length = 0  # The journal is empty again
+
+    def write(self, changes, plays, library, fields):  # Function to store changed tracks; plays are already in their data
+        if self.journal_length + len(changes) >= self.compact_size:  # If the journal has grown too long
+            self.save(library)  # Fold everything into a fresh snapshot instead
+            return
+        lines = "".join(json.dumps({"file": file_name, "info": info}) + "\n" for file_name, info in changes.items())  # One line per change
+        with open(self.journal_file, "a") as f:  # Open the journal in append mode
+            f.write(lines)  # Append the changes
+            metrics.count("bytes_written", len(lines))  # Count the bytes written
+            f.flush()  # Push the changes out of Python's buffer
+            os.fsync(f.fileno())  # Make sure the changes reached the disk
+        self.journal_length += len(changes)  # Count the new entries
+
+
+class SqliteStorage:  # Stores the library in an SQLite database shared safely between processes
+    def __init__(self, db_file):  # Initialize with the database file name
+        self.db_file = db_file  # File where the database is saved
+        self.connection = sqlite3.connect(db_file, timeout=10, check_same_thread=False)  # Wait for other writers instead of failing
+        self.connection.execute("PRAGMA journal_mode=WAL")  # Readers never block the writer and the writer never blocks readers
+        self.connection.execute("PRAGMA synchronous=NORMAL")  # Safe with WAL and avoids a disk sync per commit
+        with self.connection:  # Create the table in one transaction
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS tracks ("
+                "file TEXT PRIMARY KEY, id TEXT NOT NULL DEFAULT '', artist TEXT NOT NULL DEFAULT '', "
+                "rating INTEGER NOT NULL DEFAULT 0, play_count INTEGER NOT NULL DEFAULT 0, extra TEXT)"
+            )
+            self.connection.execute("CREATE INDEX IF NOT EXISTS tracks_id ON tracks (id)")  # Fast lookups and uniqueness checks by ID
+
+    def is_empty(self):  # Function to check if the database has no tracks yet
+        return self.connection.execute("SELECT 1 FROM tracks LIMIT 1").fetchone() is None
+
+    def load(self):  # Function to read every track
+        data = {}  # Start with an empty library
+        for file_name, track_id, artist, rating, play_count, extra in self.connection.execute(
+            "SELECT file, id, artist, rating, play_count, extra FROM tracks"
+        ):  # Loop through the rows
+            data[file_name] = TrackRecord(track_id, artist, rating, play_count, json.loads(extra) if extra else None)  # Store the compact record
+        return data  # Return the library data
+
+    def row(self, file_name, info):  # Function to turn a track into a database row
+        extra = {key: value for key, value in info.items() if key not in TRACK_COLUMNS}  # Fields without their own column
+        return (file_name, info.get("id", ""), info.get("artist", ""), info.get("rating", 0),
+                info.get("play_count", 0), json.dumps(extra) if extra else None)
+
+    def save(self, library):  # Function to write every track, used to fill the database; stored play counts are kept
+        rows = [self.row(file_name, info) for file_name, info in library.items()]  # Every track as a row
+        with self.connection:  # One transaction for the whole library
+            self.connection.executemany(
+                "INSERT INTO tracks (file, id, artist, rating, play_count, extra) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (file) DO UPDATE SET id = excluded.id, artist = excluded.artist, "
+                "rating = excluded.rating, extra = excluded.extra",  # Counts only ever grow through increments
+                rows,
+            )
+        metrics.count("rows_written", len(rows))  # Count the rows written
+        metrics.count("bytes_written", sum(self.row_size(row) for row in rows) if metrics.enabled else 0)  # Count the data written
+
+    def row_size(self, row):  # Function to estimate the bytes of data in a row, for the metrics
+        return sum(len(value) if isinstance(value, str) else 8 for value in row if value is not None)  # Text length, 8 per number
+
+    def columns(self, changed):  # Function to get the columns to update for a set of changed fields, None meaning every field
+        if changed is None:  # The whole track was replaced
+            return ("id", "artist", "rating", "extra")  # Everything but the play count, which only grows through increments
+        columns = tuple(column for column in ("id", "artist", "rating") if column in changed)  # Changed fields with their own column
+        if any(field not in TRACK_COLUMNS for field in changed):  # If a field kept in extra changed, like the cached length
+            columns += ("extra",)
+        return columns
+
+    def write(self, changes, plays, library, fields):  # Function to store changed fields and add up plays, in one transaction
+        groups = {}  # Rows grouped by the columns they update, one statement per group
+        for file_name, info in changes.items():  # Loop through each changed track
+            row = self.row(file_name, info)  # The track as a row
+            row = row[:4] + (row[4] - plays.get(file_name, 0),) + row[5:]  # New rows leave the pending plays to the increments below
+            groups.setdefault(self.columns(fields.get(file_name)), []).append(row)  # File it under its changed columns
+        with self.connection:  # Commit everything together
+            for columns, rows in groups.items():  # Loop through each group
+                if columns:  # Only the changed fields overwrite what other windows stored
+                    conflict = "DO UPDATE SET " + ", ".join(f"{column} = excluded.{column}" for column in columns)
+                else:  # Nothing but plays changed, so an existing row is left alone
+                    conflict = "DO NOTHING"
+                self.connection.executemany(
+                    "INSERT INTO tracks (file, id, artist, rating, play_count, extra) VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (file) " + conflict,  # Insert tracks the database does not have yet
+                    rows,
+                )
+            self.connection.executemany(
+                "UPDATE tracks SET play_count = play_count + ? WHERE file = ?",  # Atomic, so plays from other windows are kept
+                [(count, file_name) for file_name, count in plays.items()],
+            )
+        rows = [row for group in groups.values() for row in group]  # Every row written
+        metrics.count("rows_written", len(rows) + len(plays))  # Count the rows written
+        metrics.count("bytes_written", sum(self.row_size(row) for row in rows) + 8 * len(plays) if metrics.enabled else 0)  # Count the data written
+
+
+def open_storage(backend, data_file, journal_file, db_file, compact_size):  # Function to create the storage backend by name
+    if backend == "json":  # If the JSON files were asked for
+        return JsonStorage(data_file, journal_file, compact_size)
+    if backend != "sqlite":  # If the name is unknown
+        raise ValueError(f"Unknown storage backend: {backend}")
+    storage = SqliteStorage(db_file)  # Open or create the database
+    if storage.is_empty() and os.path.exists(data_file):  # If the library still lives in the JSON files
+        storage.save(JsonStorage(data_file, journal_file, compact_size).load())  # Copy it over; the JSON files are left as a backup
+    return storage
@@ -1,29 +1,255 @@
+import atexit  # Importing atexit to flush pending changes when the program ends
 import json  # Importing the json module to handle JSON data
 import os  # Importing the os module to interact with the operating system
+import threading  # Importing threading for the delayed journal flush
+import metrics  # Importing the timing and counter helpers
+import mp3_probe  # Importing the MP3 header reader for track lengths
+from storage import open_storage, write_atomic  # Importing the storage backends
+from track_record import TrackRecord  # Importing the compact track record
 
 track_folder = "Tracks"  # Folder where the track files are stored
 data_file = "track_data.json"  # File where track data is saved
+journal_file = "track_data.journal"  # Append-only file of changes made since the last snapshot
+db_file = "track_data.db"  # Database where track data is saved by the SQLite backend
+storage_backend = os.environ.get("JUKEBOX_STORAGE", "sqlite")  # "sqlite", or "json" for the JSON files
+scan_file = "track_scan.json"  # File where the last scan of the track folder is saved
+journal_batch_size = 50  # Number of pending changes that forces an immediate flush
+journal_flush_delay = 2.0  # Seconds to wait before flushing a smaller batch
+journal_compact_size = 1000  # Number of journal entries that triggers a JSON snapshot rewrite
+storage = None  # Storage backend, opened by load_library
 library = {}  # Initialize an empty dictionary to store track data
+id_index = {}  # Maps a track ID to its file name for constant time lookups
+artist_index = {}  # Maps an artist name to the set of file names by that artist
+pending_changes = {}  # Changed tracks waiting to be written to the storage backend
+pending_plays = {}  # Plays per track waiting to be added to the stored play counts
+pending_fields = {}  # Fields changed per pending track, or None when the whole track was replaced
+listeners = []  # Functions called with the file name of every changed track
+flush_timer = None  # Timer that flushes pending changes in the background
+scan_state = None  # Result of the last folder scan, loaded on first use
+watch_thread = None  # Thread that watches the track folder for new files
+watch_stop = threading.Event()  # Set to stop the watch thread
+lock = threading.RLock()  # Guards the library and the files against the flush timer and the watcher
 
-def load_library():  # Function to load track data from the JSON file
-    global library  # Use the global library variable
-    if os.path.exists(data_file):  # Check if the data file exists
-        with open(data_file, "r") as f:  # Open the data file in read mode
-            library = json.load(f)  # Load the JSON data into the library dictionary
+@metrics.timed("load_library")
+def load_library():  # Function to load track data from the storage backend
+    global storage  # Use the global storage variable
+    with lock:  # Keep the flush timer out while reloading
+        storage = open_storage(storage_backend, data_file, journal_file, db_file, journal_compact_size)  # Open the backend, moving JSON data into SQLite the first time
+        library.clear()  # Empty the library in place so imported references stay valid
+        library.update(storage.load())  # Load the stored data into the library dictionary
+        rebuild_indexes()  # Rebuild the lookup indexes from the loaded data
+
+@metrics.timed("save_library")
+def save_library():  # Function to save every track to the storage backend
+    with lock:  # Keep the flush timer out while writing
+        flush_journal()  # Add the pending plays first, a full save keeps the stored play counts
+        storage.save(library)  # Write the whole library
+        metrics.count("saves")  # Count the save
+
+def queue_change(file_name, fields=None):  # Function to add a track to the pending changes and tell the listeners
+    pending_changes[file_name] = dict(library[file_name])  # Copy the data so later edits cannot race the flush
+    if fields is None or pending_fields.get(file_name, ()) is None:  # If the whole track was replaced, now or earlier in the batch
+        pending_fields[file_name] = None  # Write every field
     else:
-        library = {}  # If no data file, initialize an empty dictionary
+        pending_fields[file_name] = pending_fields.get(file_name, frozenset()) | frozenset(fields)  # Write only the changed fields
+    for listener in listeners:  # Tell every screen about the change
+        listener(file_name)  # Listeners may be called from the watcher thread
+
+def record_change(file_name, fields=None):  # Function to queue a track, or some of its fields, for writing to the storage backend
+    global flush_timer  # Use the global flush timer variable
+    with lock:  # Keep the flush timer out while queueing
+        queue_change(file_name, fields)  # Add the track to the pending changes
+        if len(pending_changes) >= journal_batch_size:  # If the batch is full
+            flush_journal()  # Write it straight away
+        elif flush_timer is None:  # If no flush is scheduled yet
+            flush_timer = threading.Timer(journal_flush_delay, flush_journal)  # Schedule a flush for the batch
+            flush_timer.daemon = True  # Do not keep the program alive for the timer
+            flush_timer.start()  # Start counting down
+
+@metrics.timed("flush_journal")
+def flush_journal():  # Function to write the pending changes to the storage backend
+    global flush_timer  # Use the global flush timer variable
+    with lock:  # Keep other threads out while writing
+        if flush_timer is not None:  # If a flush was scheduled
+            flush_timer.cancel()  # This flush covers it
+            flush_timer = None  # Allow the next change to schedule a new flush
+        if not pending_changes and not pending_plays:  # If there is nothing to write
+            return
+        storage.write(pending_changes, pending_plays, library, pending_fields)  # Write only what changed
+        metrics.count("saves")  # Count the save
+        pending_changes.clear()  # The changes are safe now
+        pending_plays.clear()  # The plays are safe now
+        pending_fields.clear()  # So are the changed fields
+
+def add_listener(listener):  # Function to be told about every changed track
+    listeners.append(listener)  # Remember the listener
+
+def remove_listener(listener):  # Function to stop being told about changed tracks
+    if listener in listeners:  # If the listener was added
+        listeners.remove(listener)  # Forget the listener
 
-def save_library():  # Function to save track data to the JSON file
-    with open(data_file, "w") as f:  # Open the data file in write mode
-        json.dump(library, f, indent=4)  # Write the library dictionary to the file with indentation
+def record_play(file_name):  # Function to add one play to a track
+    with lock:  # Keep the flush timer out while updating
+        info = library[file_name]  # Get the track data
+        info["play_count"] = info.get("play_count", 0) + 1  # Increment play count
+        pending_plays[file_name] = pending_plays.get(file_name, 0) + 1  # Queue the play as an increment, not a new total
+        metrics.count("plays")  # Count the play
+        record_change(file_name, ())  # Queue the play alone, so edits made in other windows are not overwritten
 
+def track_duration(file_name, decode=None):  # Function to get the length of a track in seconds, raising OSError if the file is gone
+    path = os.path.join(track_folder, file_name)  # Get track path
+    stat = os.stat(path)  # Get the file size and modification time
+    key = (stat.st_size, stat.st_mtime)  # The cached length is only valid for this exact file
+    with lock:  # Keep the flush timer out while reading
+        info = library[file_name]  # Get the track data
+        if info.get("duration_key") == key:  # If the length was read from this exact file
+            return info["duration"]  # Return the cached length
+    duration = mp3_probe.probe_duration(path)  # Read it from the MP3 headers, without holding up other threads
+    if duration is None and decode is not None:  # If the headers gave nothing, like a file with no frame found
+        duration = decode(path)  # Fall back to the slower decoder, once for this file
+    if not duration:  # If the length is still unknown
+        return 0  # Do not cache it, so the next play tries again
+    with lock:  # Keep the flush timer out while updating
+        info = library[file_name]  # Get the track data again, it may have been replaced meanwhile
+        info["duration"] = duration  # Cache the length
+        info["duration_key"] = key  # Remember which file the length belongs to
+        record_change(file_name, ("duration", "duration_key"))  # Queue only the cached length for the storage backend
+    return duration  # Return the length
+
+@metrics.timed("list_tracks")
 def list_tracks():  # Function to list all the MP3 tracks in the folder
-    files = [f for f in os.listdir(track_folder) if f.endswith(".mp3")]  # Get all MP3 files in the track folder
-    for file in files:  # Loop through each track file
-        if file not in library:  # If the track is not in the library
-            library[file] = {"id": "", "artist": "", "rating": 0}  # Add the track with empty data
-    save_library()  # Save the updated library to the data file
+    files, added, removed = scan_tracks()  # Get all MP3 files in the track folder and what changed
+    with lock:  # Keep the watcher and the flush timer out while updating
+        add_tracks(files)  # Add any file the library is missing, even one the scan saw before the library was replaced
     return files  # Return the list of MP3 files
 
+def add_tracks(files):  # Function to add newly found track files to the library in one write
+    with lock:  # Keep the flush timer out until everything is written
+        added = 0  # Number of tracks added
+        for file in files:  # Loop through each new track file
+            if file not in library:  # If the track is not in the library
+                library[file] = TrackRecord()  # Add the track with empty data
+                index_track(file, library[file])  # Add it to the indexes
+                queue_change(file, ())  # Insert it without overwriting data another window stored for it
+                added += 1  # Count the track
+        if added:  # If any track was added
+            flush_journal()  # Write them all together instead of one batch per fifty
+
+def load_scan_state():  # Function to load the result of the previous folder scan
+    global scan_state  # Use the global scan state variable
+    if scan_state is None:  # Only read the file once per run
+        scan_state = {"mtime": None, "files": {}}  # Start as if the folder was never scanned
+        if os.path.exists(scan_file):  # Check if a previous scan was saved
+            with open(scan_file, "r") as f:  # Open the scan file in read mode
+                try:
+                    scan_state = json.load(f)  # Load the previous scan
+                except ValueError:  # A damaged scan file only costs one full scan
+                    pass
+    return scan_state  # Return the scan state
+
+def read_folder(known_mtime):  # Function to read the track folder, called without the lock so the Tk thread is not held up
+    if not os.path.isdir(track_folder):  # If the track folder is missing
+        return None, None
+    folder_mtime = os.stat(track_folder).st_mtime  # Adding, removing or renaming a file changes this
+    if folder_mtime == known_mtime:  # If the folder is unchanged
+        return folder_mtime, None  # There is no need to read it
+    files = {}  # Collect the size and modification time of each MP3 file
+    with os.scandir(track_folder) as entries:  # Read the folder once, stat data included
+        for entry in entries:  # Loop through each folder entry
+            if entry.name.endswith(".mp3") and entry.is_file():  # Keep only MP3 files
+                stat = entry.stat()  # Get the file size and modification time
+                files[entry.name] = [stat.st_size, stat.st_mtime]  # Remember them for the next scan
+    return folder_mtime, files  # Return the folder time and its MP3 files
+
+def scan_tracks():  # Function to find the MP3 files added or removed since the last scan
+    with lock:  # Keep other threads out while reading the previous scan
+        known_mtime = load_scan_state()["mtime"]  # Folder time of the previous scan
+    folder_mtime, files = read_folder(known_mtime)  # Read the folder without holding the lock
+    with lock:  # Keep other threads out while comparing
+        state = load_scan_state()  # Get the previous scan
+        if folder_mtime is None:  # If the track folder is missing
+            return [], [], []  # There is nothing to list
+        if files is None or state["mtime"] != known_mtime:  # If the folder is unchanged, or another scan finished meanwhile
+            return list(state["files"]), [], []  # Reuse the latest listing
+        added = [f for f in files if f not in state["files"]]  # Files that are new since the last scan
+        removed = [f for f in state["files"] if f not in files]  # Files that are gone since the last scan
+        modified = any(state["files"][f] != stat for f, stat in files.items() if f in state["files"])  # Files rewritten in place
+        state["mtime"] = folder_mtime  # Skip the folder read next time while it stays unchanged
+        state["files"] = files  # Keep the new listing
+        if added or removed or modified:  # Only touch the disk when the listing really changed
+            write_atomic(scan_file, json.dumps(state))  # Save the scan for the next run
+        return list(files), added, removed  # Return the listing and the differences
+
+def start_watching(on_change=None, interval=2.0):  # Function to pick up new MP3 files in the background
+    global watch_thread  # Use the global watch thread variable
+    if watch_thread is not None and watch_thread.is_alive():  # If a watcher is already running
+        return
+    watch_stop.clear()  # Allow the new watcher to run
+    watch_thread = threading.Thread(target=watch_tracks, args=(on_change, interval), daemon=True)  # Watch on a separate thread
+    watch_thread.start()  # Start watching
+
+def stop_watching():  # Function to stop the background watcher
+    watch_stop.set()  # Ask the watcher to finish
+
+def watch_tracks(on_change, interval):  # Function run by the watcher thread
+    while not watch_stop.wait(interval):  # Sleep between scans until asked to stop
+        files, added, removed = scan_tracks()  # Look for changes in the folder, only locking to compare
+        with lock:  # Keep the Tk thread and the flush timer out while updating
+            add_tracks(added)  # Add the new files to the library
+        if (added or removed) and on_change is not None:  # If the folder changed
+            on_change(added, removed)  # Tell the caller; this runs on the watcher thread, not the Tk thread
+
+def rebuild_indexes():  # Function to rebuild every lookup index from the library
+    id_index.clear()  # Forget all known IDs
+    artist_index.clear()  # Forget all known artists
+    for file_name, info in library.items():  # Loop through every track
+        index_track(file_name, info)  # Add the track to the indexes
+
+def index_track(file_name, info):  # Function to add one track to the lookup indexes
+    if info.get("id"):  # Empty IDs mean "not assigned yet" and are not indexed
+        id_index[info["id"]] = file_name  # Remember which file owns the ID
+    artist_index.setdefault(info.get("artist", ""), set()).add(file_name)  # Group the file under its artist
+
+def unindex_track(file_name, info):  # Function to remove one track from the lookup indexes
+    if id_index.get(info.get("id")) == file_name:  # Only drop the ID if this file owns it
+        del id_index[info["id"]]  # Release the ID
+    files = artist_index.get(info.get("artist", ""))  # Get the files grouped under the artist
+    if files is not None:  # If the artist is known
+        files.discard(file_name)  # Remove the file from the group
+        if not files:  # If the artist has no files left
+            del artist_index[info.get("artist", "")]  # Drop the empty group
+
+def set_track(file_name, info):  # Function to add or replace a track and keep the indexes in sync
+    with lock:  # Keep the flush timer out while updating
+        old_info = library.get(file_name)  # Get the previous data for the track, if any
+        if old_info is not None:  # If the track was already in the library
+            unindex_track(file_name, old_info)  # Remove the old data from the indexes
+        library[file_name] = TrackRecord.from_dict(info)  # Store the new data as a compact record
+        index_track(file_name, library[file_name])  # Add the new data to the indexes
+        record_change(file_name)  # Queue the change for the storage backend
+
+@metrics.timed("set_tracks")
+def set_tracks(changes):  # Function to add or replace many tracks and save them all in one write
+    with lock:  # Keep the flush timer out until everything is written
+        for file_name, info in changes.items():  # Loop through each changed track
+            old_info = library.get(file_name)  # Get the previous data for the track, if any
+            if old_info is not None:  # If the track was already in the library
+                unindex_track(file_name, old_info)  # Remove the old data from the indexes
+            library[file_name] = TrackRecord.from_dict(info)  # Store the new data as a compact record
+            index_track(file_name, library[file_name])  # Add the new data to the indexes
+            queue_change(file_name)  # Add it to the pending changes without flushing yet
+        flush_journal()  # Write every change together
+
+def find_track(track_id):  # Function to find the file name for a track ID
+    return id_index.get(track_id)  # Return the file name, or None if the ID is unknown
+
+def is_id_used(track_id, exclude=None):  # Function to check if a track ID is taken by another file
+    owner = id_index.get(track_id)  # Get the file that owns the ID
+    return owner is not None and owner != exclude  # Taken if owned by a different file
+
+def tracks_by_artist(artist):  # Function to list the file names by an artist
+    return set(artist_index.get(artist, ()))  # Return a copy so callers cannot corrupt the index
+
+atexit.register(flush_journal)  # Write any pending changes when the program ends
 load_library()  # Load the existing track data when the program starts
 list_tracks()  # List the tracks and update the data
@@ -1,38 +1,65 @@
 import tkinter as tk  # Import Tkinter for GUI
-import os  # Import os module for interacting with the operating system
-import font_manager as fonts  # Import custom font manager 
+import importlib  # Import importlib to load screen modules only when they are first opened
+import font_manager as fonts  # Import custom font manager
 
-def close_program():  
-    window.destroy()  # Function to close the window
+screen_classes = {"create_track_list": "CreateTrackList", "update_tracks": "UpdateTracks"}  # Screen class in each screen module
+screens = {}  # Screens built so far, reused on later visits
+window = None  # The one Tkinter window shared by every screen
+menu_frame = None  # Frame holding the main menu
 
-def create_track_list_clicked():  
-    close_program()  # Close the window
-    os.system("python create_track_list.py")  # Execute 'create_track_list.py' script
+def show_menu():  # Function to swap the current screen for the main menu
+    for screen in screens.values():  # Loop through the built screens
+        screen.window.pack_forget()  # Hide the screen
+    window.geometry("500x300")  # Set the window size
+    window.title("JukeBox")  # Set the window title to "JukeBox"
+    menu_frame.pack(fill="both", expand=True)  # Show the menu
 
-def update_tracks_clicked():  
-    close_program()  # Close the window
-    os.system("python update_tracks.py")  # Execute 'update_tracks.py' script
+def show_screen(module_name):  # Function to swap the main menu for a screen
+    menu_frame.pack_forget()  # Hide the menu
+    screen = screens.get(module_name)  # Get the screen if it was built before
+    if screen is None:  # If this is the first visit
+        module = importlib.import_module(module_name)  # Import the screen now so pygame is only loaded when needed
+        screen_class = getattr(module, screen_classes[module_name])  # Get the screen class
+        screen = screen_class(tk.Frame(window), on_back=show_menu)  # Build the screen inside its own frame
+        screens[module_name] = screen  # Keep it for later visits
+    else:
+        screen.show()  # Bring the screen up to date
+    screen.window.pack(fill="both", expand=True)  # Show the screen
 
-window = tk.Tk()  # Create a  window object
-window.geometry("500x300")  # Set the window size 
-window.title("JukeBox")  # Set the window title to "JukeBox"
+def create_track_list_clicked():
+    show_screen("create_track_list")  # Switch to the Create Track List screen
 
-fonts.configure()  # Configure fonts (custom font management)
+def update_tracks_clicked():
+    show_screen("update_tracks")  # Switch to the Update Tracks screen
 
-header_lbl = tk.Label(  # Create a label widget
-    window, text="Select an option by clicking one of the buttons below"  # Set the label text
-)
-header_lbl.grid(padx=10, pady=10)  # Place the label on the grid with padding
+def main(start_screen=None):  # Function to build the window and run the program
+    global window, menu_frame  # Use the global window and menu variables
+    window = tk.Tk()  # Create a  window object
 
-create_track_list_btn = tk.Button(  # Create a button widget for creating track list
-    window, text="Create Track List", command=create_track_list_clicked  # Set text and command
-)
-create_track_list_btn.grid(pady=20)  # Place the button on the grid with padding
+    fonts.configure()  # Configure fonts (custom font management)
 
-update_tracks_btn = tk.Button(  # Create a button widget for updating tracks
-    window, text="Update Tracks", command=update_tracks_clicked  # Set text and command
-)
-update_tracks_btn.grid(pady=20)  # Place the button on the grid with padding
+    menu_frame = tk.Frame(window)  # Create a frame for the menu widgets
 
-window.mainloop()  # Start the Tkinter event loop
+    header_lbl = tk.Label(  # Create a label widget
+        menu_frame, text="Select an option by clicking one of the buttons below"  # Set the label text
+    )
+    header_lbl.grid(padx=10, pady=10)  # Place the label on the grid with padding
 
+    create_track_list_btn = tk.Button(  # Create a button widget for creating track list
+        menu_frame, text="Create Track List", command=create_track_list_clicked  # Set text and command
+    )
+    create_track_list_btn.grid(pady=20)  # Place the button on the grid with padding
+
+    update_tracks_btn = tk.Button(  # Create a button widget for updating tracks
+        menu_frame, text="Update Tracks", command=update_tracks_clicked  # Set text and command
+    )
+    update_tracks_btn.grid(pady=20)  # Place the button on the grid with padding
+
+    show_menu()  # Start on the main menu
+    if start_screen is not None:  # If a screen was asked for
+        show_screen(start_screen)  # Open it straight away
+
+    window.mainloop()  # Start the Tkinter event loop
+
+if __name__ == "__main__":  # If running as main program
+    main()  # Start on the main menu
@@ -0,0 +1,84 @@
+import sys  # Importing sys to intern artist names
+
+FIELDS = ("id", "artist", "rating", "play_count")  # Fields every track has, stored in their own slots
+CACHED = ("duration", "duration_key")  # Fields set once the length is read, also stored in slots
+
+
+class TrackRecord:  # Compact track data that still reads and writes like the old per-track dict
+    __slots__ = ("id", "artist", "rating", "play_count", "duration", "file_size", "file_mtime", "extra")  # No per-record dict
+
+    def __init__(self, id="", artist="", rating=0, play_count=0, extra=None):  # Initialize with the track fields
+        self.id = id  # Track ID, kept as text so leading zeros survive
+        self.artist = sys.intern(artist)  # Artist name, shared between all tracks by the same artist
+        self.rating = rating  # Rating from 0 to 5
+        self.play_count = play_count  # Number of plays
+        self.duration = None  # Cached length in seconds, or None if never read
+        self.file_size = None  # Size of the file the length was read from
+        self.file_mtime = None  # Modification time of the file the length was read from
+        self.extra = None  # Dict of any other fields, or None
+        if extra:  # If other fields were given
+            for key, value in extra.items():  # Loop through them
+                self[key] = value  # The cached length goes to its slots, anything else to extra
+
+    @classmethod
+    def from_dict(cls, info):  # Function to build a record from a dict, or return a record unchanged
+        if isinstance(info, cls):  # Already compact
+            return info
+        extra = {key: value for key, value in info.items() if key not in FIELDS}  # Fields without a fixed slot
+        return cls(info.get("id", ""), info.get("artist") or "", info.get("rating", 0), info.get("play_count", 0), extra or None)
+
+    def __getitem__(self, key):  # Function to read a field like a dict: info["id"]
+        if key in FIELDS:  # If the field has a slot
+            return getattr(self, key)  # Read the slot
+        if key == "duration" and self.duration is not None:  # If the length was read
+            return self.duration
+        if key == "duration_key" and self.file_size is not None:  # If the length was read
+            return (self.file_size, self.file_mtime)  # The file it belongs to, as a (size, mtime) pair
+        if self.extra is not None and key in self.extra:  # If it is one of the other fields
+            return self.extra[key]
+        raise KeyError(key)  # Unknown field, like a dict
+
+    def __setitem__(self, key, value):  # Function to write a field like a dict: info["rating"] = 5
+        if key in FIELDS:  # If the field has a slot
+            setattr(self, key, sys.intern(value) if key == "artist" else value)  # Write the slot
+        elif key == "duration":  # The cached length
+            self.duration = value
+        elif key == "duration_key":  # The (size, mtime) pair, a list when read back from JSON
+            self.file_size, self.file_mtime = value
+        else:
+            if self.extra is None:  # If there were no other fields yet
+                self.extra = {}  # Start them
+            self.extra[key] = value  # Write the field
+
+    def get(self, key, default=None):  # Function to read a field with a fallback, like dict.get
+        try:
+            return self[key]
+        except KeyError:  # Unknown field
+            return default
+
+    def __contains__(self, key):  # Function to check if a field is set, like a dict
+        try:
+            self[key]  # Read the field
+        except KeyError:  # Not set
+            return False
+        return True
+
+    def keys(self):  # Function to list the fields, which also lets dict(record) work
+        keys = list(FIELDS)  # Every track has these
+        if self.duration is not None:  # If the length was read
+            keys.append("duration")
+        if self.file_size is not None:  # If the file it belongs to is known
+            keys.append("duration_key")
+        return keys + (list(self.extra) if self.extra else [])
+
+    def __iter__(self):  # Function to loop over the fields, like a dict
+        return iter(self.keys())
+
+    def __len__(self):  # Function to count the fields, like a dict
+        return len(self.keys())
+
+    def items(self):  # Function to list (field, value) pairs, like a dict
+        return [(key, self[key]) for key in self.keys()]
+
+    def __repr__(self):  # Function to show the record like the dict it replaces
+        return repr(dict(self))
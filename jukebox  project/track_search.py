@@ -0,0 +1,107 @@
+import bisect  # Import bisect to find every word starting with a prefix
+import re  # Import re to split titles and artists into words
+
+WORD = re.compile(r"\w+")  # A word is a run of letters, digits or underscores
+SET_LIMIT = 5000  # Query terms matching more tracks than this are checked per track instead of gathered
+
+
+class TrackSearch:  # Prefix index over song names and artists
+    def __init__(self):  # Initialize an empty index
+        self.postings = {}  # Maps each word to the set of file names containing it
+        self.words = []  # Every distinct word, sorted so a prefix is one contiguous range
+        self.track_words = {}  # Maps each file name to the words it is indexed under
+
+    def build(self, library):  # Function to index a whole library at once
+        self.postings = {}  # Start from an empty index
+        self.track_words = {}  # Forget the old words
+        postings = self.postings  # Local name for the loop below
+        for file_name, info in library.items():  # Loop through every track
+            words = self.words_for(file_name, info)  # Split the title and artist into words
+            self.track_words[file_name] = words  # Remember them for later updates
+            for word in words:  # Loop through each word
+                files = postings.get(word)  # Tracks already filed under the word
+                if files is None:  # If the word is new
+                    postings[word] = {file_name}  # Start its set with this track
+                else:
+                    files.add(file_name)  # File the track under the word
+        self.words = sorted(self.postings)  # Sort once instead of inserting word by word
+
+    def words_for(self, file_name, info):  # Function to get the words a track is found by
+        title = file_name[:-4] if file_name.endswith(".mp3") else file_name  # Song name without extension
+        return frozenset(WORD.findall(f"{title} {info.get('artist', '')}".lower()))  # Lowercase words of title and artist
+
+    def update_track(self, file_name, info):  # Function to re-index one added or edited track
+        new_words = self.words_for(file_name, info) if info is not None else frozenset()  # None means the track is gone
+        old_words = self.track_words.get(file_name, frozenset())  # Words it was indexed under before
+        if new_words == old_words:  # Most edits, like play counts, do not change the words
+            return
+        for word in old_words - new_words:  # Words the track lost
+            files = self.postings[word]  # Tracks filed under the word
+            files.discard(file_name)  # Remove this track
+            if not files:  # If no track uses the word any more
+                del self.postings[word]  # Drop the word
+                del self.words[bisect.bisect_left(self.words, word)]  # Remove it from the sorted words
+        for word in new_words - old_words:  # Words the track gained
+            if word not in self.postings:  # If the word is new to the index
+                self.postings[word] = set()  # Start its set
+                bisect.insort(self.words, word)  # Add it to the sorted words
+            self.postings[word].add(file_name)  # File the track under the word
+        if new_words:  # If the track is still in the library
+            self.track_words[file_name] = new_words  # Remember its words
+        else:
+            self.track_words.pop(file_name, None)  # Forget the track
+
+    def prefix_words(self, prefix):  # Function to yield every indexed word starting with a prefix
+        for i in range(bisect.bisect_left(self.words, prefix), len(self.words)):  # Start at the first word not below the prefix
+            if not self.words[i].startswith(prefix):  # Past the end of the range
+                break
+            yield self.words[i]  # A matching word
+
+    def matches(self, term):  # Function to get the words a term is a prefix of, or None if they hold too many tracks to gather
+        words = []  # Words starting with the term
+        total = 0  # Tracks filed under them
+        for word in self.prefix_words(term):  # Loop through the words starting with the term
+            total += len(self.postings[word])  # Count their tracks
+            if total > SET_LIMIT:  # Too common to be worth gathering
+                return None, total
+            words.append(word)  # Keep the word
+        return words, total  # The words and their track total
+
+    def search(self, query, limit=50):  # Function to find tracks whose words start with every word of the query
+        terms = set(WORD.findall(query.lower()))  # Distinct words of the query
+        if not terms:  # If there is nothing to search for
+            return []
+        rare = []  # (track total, term, words) of the terms few tracks match
+        common = []  # Terms too common to gather, checked against each track's own words instead
+        for term in terms:  # Loop through the terms
+            words, total = self.matches(term)  # Find the words the term is a prefix of
+            if total == 0:  # If a term matches nothing
+                return []
+            if words is None:  # Too common to gather
+                common.append(term)  # Check it per track
+            else:  # Few enough tracks
+                rare.append((total, term, words))  # Gather it
+        rare.sort()  # Fewest matching tracks first
+        if rare:  # If some term is rare enough
+            first = rare[0][2]  # Walk the tracks of the rarest term
+            sets = []  # Tracks of the other rare terms
+            for total, term, words in rare[1:]:  # Loop through the other rare terms
+                found = set()  # Tracks of the term
+                for word in words:  # Loop through its words
+                    found |= self.postings[word]  # Add their tracks
+                sets.append(found)  # Use the set to narrow down
+        else:  # Every term is common, so matches are plentiful
+            common.sort(key=len, reverse=True)  # The longest term is the likeliest to be the rarest
+            first = self.prefix_words(common.pop(0))  # Walk its words lazily, stopping at a screenful
+            sets = []
+        results = set()  # Tracks matching every term
+        for word in first:  # Loop through the words of the first term
+            for file_name in self.postings[word]:  # Loop through their tracks
+                if file_name in results:  # Already found under another word
+                    continue
+                if all(file_name in found for found in sets) and all(  # In every gathered set
+                        any(w.startswith(term) for w in self.track_words[file_name]) for term in common):  # And has a word for every common term
+                    results.add(file_name)  # A match
+                    if len(results) >= limit:  # Stop once there is a screenful
+                        return sorted(results)
+        return sorted(results)  # The results in file name order
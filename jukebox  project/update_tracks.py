@@ -1,26 +1,24 @@
 import tkinter as tk  # Importing Tkinter for GUI
-from tkinter import ttk  # Importing ttk for styled widgets
-from track_library import library, save_library, list_tracks  # Importing functions and data from track_library
-import os  # Importing os module to interact with the operating system
+from track_library import library, list_tracks, set_track, is_id_used, flush_journal, start_watching, stop_watching, add_listener  # Importing functions and data from track_library
+from virtual_table import VirtualTable  # Importing the table that only draws the rows on screen
+import metrics  # Importing the timing helpers
 
 class UpdateTracks:
-    def __init__(self, window):  # Constructor for UpdateTracks class
-        self.window = window  # Assigning window parameter to instance
-        self.window.title("Update Tracks")  # Setting window title
-        self.window.geometry("900x400")  # Setting window size
+    def __init__(self, window, on_back=None):  # Constructor for UpdateTracks class
+        self.window = window  # Assigning window (or frame) parameter to instance
+        self.on_back = on_back  # Function that shows the previous screen
+        self.window.winfo_toplevel().title("Update Tracks")  # Setting window title
+        self.window.winfo_toplevel().geometry("900x400")  # Setting window size
         
         go_back_btn = tk.Button(window, text="Go Back", command=lambda: self.go_back(window))  # Go back button
         go_back_btn.grid(row=0, column=2, sticky="e", padx=10, pady=5)  # Positioning the button
 
         columns = ("ID", "Song Name", "Artist", "Rating", "Play Count")  # Defining columns for Treeview
-        self.tree = ttk.Treeview(self.window, columns=columns, show="headings", height=15)  # Creating Treeview widget
-        self.tree.grid(row=1, column=0, rowspan=6, padx=10, pady=10)  # Positioning Treeview
+        self.table = VirtualTable(self.window, columns, self.row_values, self.row_sort_key, height=15)  # Creating the table, keyed by file name
+        self.table.frame.grid(row=1, column=0, rowspan=6, padx=10, pady=10)  # Positioning the table
+        self.tree = self.table.tree  # Treeview inside the table
 
-        for col in columns:  # Looping through columns to set headers and column width
-            self.tree.heading(col, text=col)  # Setting column headers
-            self.tree.column(col, width=120, anchor="center")  # Setting column width and alignment
-
-        self.tree.bind("<<TreeviewSelect>>", self.on_select)  # Binding selection event to on_select method
+        self.tree.bind("<<TreeviewSelect>>", self.on_select, add="+")  # Binding selection event to on_select method
 
         validate_numeric = self.window.register(self.validate_numeric)  # Registering validation function for numeric entries
 
@@ -42,48 +40,77 @@ class UpdateTracks:
         self.status_label = tk.Label(self.window, text="", fg="green")  # Label to show status messages
         self.status_label.grid(row=5, column=1, columnspan=2)  # Positioning Status label
 
+        self.changed_tracks = set()  # Tracks changed since the table was last brought up to date
+        add_listener(self.changed_tracks.add)  # Hearing about every change, including ones from the watcher thread
         self.refresh_track_list()  # Refreshing the track list when the window is created
 
+        start_watching()  # Watching the Tracks folder for new files
+        self.check_job = None  # Scheduled check for changes, only while the screen is shown
+        self.check_changes()  # Applying changes on the Tkinter thread
+
+    @metrics.timed("refresh_track_list")
     def refresh_track_list(self):  # Method to refresh the list of tracks in the Treeview
-        self.tree.delete(*self.tree.get_children())  # Deleting existing Treeview entries
-        for file, info in library.items():  # Looping through the library
-            song_name = file.replace(".mp3", "")  # Extracting song name by removing .mp3
-            self.tree.insert("", "end", values=(  # Inserting new row into Treeview
-                info["id"], song_name, info["artist"], info["rating"], info.get("play_count", 0)
-            ))
+        self.changed_tracks.clear()  # Every track is about to be read again
+        self.table.set_rows(library)  # Handing every file name to the table, only visible rows are drawn
+
+    def row_values(self, file):  # Method giving the values shown in a track's row
+        info = library[file]  # Getting the track data
+        song_name = file.replace(".mp3", "")  # Extracting song name by removing .mp3
+        return (info["id"], song_name, info["artist"], info["rating"], info.get("play_count", 0))
+
+    def row_sort_key(self, file):  # Method giving the sort key of a track for each column
+        info = library[file]  # Getting the track data
+        track_id = info["id"]  # Getting the ID, sorted by number with unassigned IDs last
+        return ((not track_id.isdigit(), int(track_id) if track_id.isdigit() else 0), file.lower(), info["artist"].lower(), info["rating"], info.get("play_count", 0))
+
+    @metrics.timed("apply_changes")
+    def apply_changes(self):  # Method to redraw only the tracks that changed
+        while self.changed_tracks:  # Until every change is handled
+            self.table.update_row(self.changed_tracks.pop())  # Updating that one row
+
+    def show(self):  # Method to bring the screen up to date when it is shown again
+        self.window.winfo_toplevel().title("Update Tracks")  # Setting window title
+        self.window.winfo_toplevel().geometry("900x400")  # Setting window size
+        self.apply_changes()  # Showing play counts made on other screens
+        start_watching()  # Watching the Tracks folder again
+        if self.check_job is None:  # If the checks were stopped when the screen was left
+            self.check_changes()  # Checking for changes again
+
+    def check_changes(self):  # Method to show changes made off the Tkinter thread, such as new files from the watcher
+        self.apply_changes()  # Updating the changed rows
+        self.check_job = self.window.after(1000, self.check_changes)  # Checking again in a second
 
     def on_select(self, event):  # Method called when a track is selected in the Treeview
         selected_item = self.tree.selection()  # Getting selected item
         if selected_item:  # If a track is selected
-            values = self.tree.item(selected_item, "values")  # Retrieving selected track values
+            info = library[selected_item[0]]  # Row IDs are file names
             self.id_entry.delete(0, tk.END)  # Clearing the ID entry field
-            self.id_entry.insert(0, values[0])  # Inserting selected ID into the field
+            self.id_entry.insert(0, info["id"])  # Inserting selected ID into the field
             self.artist_entry.delete(0, tk.END)  # Clearing the Artist entry field
-            self.artist_entry.insert(0, values[2])  # Inserting selected Artist into the field
+            self.artist_entry.insert(0, info["artist"])  # Inserting selected Artist into the field
             self.rating_entry.delete(0, tk.END)  # Clearing the Rating entry field
-            self.rating_entry.insert(0, values[3])  # Inserting selected Rating into the field
+            self.rating_entry.insert(0, info["rating"])  # Inserting selected Rating into the field
 
     def update_track(self):  # Method to update the selected track
-        selected_item = self.tree.selection()  # Getting selected item
-        if selected_item:  # If a track is selected
-            values = self.tree.item(selected_item, "values")  # Retrieving selected track values
-            file_name = f"{values[1]}.mp3"  # Constructing file name based on song name
+        file_name = self.table.selected  # Getting the selected file name, even if it is scrolled off screen
+        if file_name is not None:  # If a track is selected
 
             new_id = self.id_entry.get().strip()  # Getting new ID from entry
 
-            if any(info['id'] == new_id for track, info in library.items() if track != file_name):  # Checking if ID already exists
+            if is_id_used(new_id, exclude=file_name):  # Checking if ID already exists
                 self.status_label.config(text="The ID is already used.", fg="red")  # Showing error message
                 return
 
-            library[file_name] = {  # Updating track information in the library
+            info = dict(library[file_name])  # Copying the track data so cached fields such as the length are kept
+            info.update({  # Updating track information
                 "id": new_id,
                 "artist": self.artist_entry.get(),
                 "rating": int(self.rating_entry.get()),
                 "play_count": library[file_name].get("play_count", 0),
-            }
-            save_library()  # Saving updated library
+            })
+            set_track(file_name, info)  # Storing it in the library; set_track queues the change for saving
 
-            self.refresh_track_list()  # Refreshing the track list
+            self.apply_changes()  # Redrawing the updated row
             self.status_label.config(text="Track updated successfully!", fg="green")  # Success message
         else:
             self.status_label.config(text="No track selected.", fg="red")  # Error message if no track is selected
@@ -93,15 +120,18 @@ class UpdateTracks:
             return True
         return False
     
-    def go_back(self, window):  # Method to close current window and open track player
-        window.destroy()  # Destroying current window
-        try:
-            os.system("python track_player.py")  # Running track_player.py
-        except Exception as e:  # Catching exceptions if track_player.py fails
-            print(f"Error launching track_player.py: {e}")
+    def go_back(self, window):  # Method to leave this screen and show the track player menu
+        stop_watching()  # Stopping the folder watcher
+        if self.check_job is not None:  # If a check is scheduled
+            self.window.after_cancel(self.check_job)  # Nothing changes on a hidden screen that needs showing
+            self.check_job = None  # Let show() start the checks again
+        flush_journal()  # Saving pending changes
+        if self.on_back is not None:  # If this screen was opened from the menu
+            self.on_back()  # Showing the menu again
+        else:
+            window.destroy()  # Destroying current window
 
 if __name__ == "__main__":  # Main block to run the program
-    root = tk.Tk()  # Creating Tkinter window
-    app = UpdateTracks(root)  # Creating UpdateTracks object
-    root.mainloop()  # Running the main loop
+    import track_player  # Importing the menu only when running on our own
+    track_player.main("update_tracks")  # Running the jukebox starting on this screen
 
@@ -0,0 +1,137 @@
+import tkinter as tk  # Import tkinter for GUI
+from tkinter import ttk  # Import ttk for the Treeview and Scrollbar widgets
+import bisect  # Import bisect to move one row without re-sorting everything
+import metrics  # Import the timing helpers
+
+
+class VirtualTable:  # A Treeview that only holds the rows currently on screen
+    def __init__(self, master, columns, get_values, get_sort_key, height=15):  # Initialize with the row callbacks
+        self.frame = tk.Frame(master)  # Frame holding the table and its scrollbar
+        self.get_values = get_values  # Function returning the displayed values for a row key
+        self.get_sort_key = get_sort_key  # Function returning a tuple of per-column sort keys for a row key
+        self.height = height  # Number of rows on screen
+        self.rows = []  # Every row key, in ascending order of the sort column
+        self.sort_keys = {}  # Precomputed sort key tuple for each row key
+        self.sort_column = None  # Column the rows are sorted by, None for library order
+        self.reverse = False  # Show the rows in descending order
+        self.top = 0  # Position of the first row on screen
+        self.selected = None  # Key of the selected row, kept while it is scrolled off screen
+
+        self.tree = ttk.Treeview(self.frame, columns=columns, show="headings", height=height, selectmode="browse")  # Creating Treeview widget
+        self.tree.grid(row=0, column=0)  # Positioning Treeview
+        self.scrollbar = ttk.Scrollbar(self.frame, orient="vertical", command=self.on_scroll)  # Scrollbar covering every row
+        self.scrollbar.grid(row=0, column=1, sticky="ns")  # Positioning Scrollbar
+        for i, col in enumerate(columns):  # Looping through columns to set headers and column width
+            self.tree.heading(col, text=col, command=lambda i=i: self.sort_by(i))  # Setting column headers, click to sort
+            self.tree.column(col, width=120, anchor="center")  # Setting column width and alignment
+        self.tree.tag_configure("selected", background="#cce0ff")  # Look of the selected row when it is drawn again
+
+        self.tree.bind("<<TreeviewSelect>>", self.on_select, add="+")  # Remember the selected row key
+        self.tree.bind("<MouseWheel>", lambda e: self.scroll_by(-1 if e.delta > 0 else 1) or "break")  # Windows and macOS wheel
+        self.tree.bind("<Button-4>", lambda e: self.scroll_by(-1) or "break")  # Linux wheel up
+        self.tree.bind("<Button-5>", lambda e: self.scroll_by(1) or "break")  # Linux wheel down
+        self.tree.bind("<Up>", lambda e: self.move_selection(-1) or "break")  # Arrow keys move through every row, not just the drawn ones
+        self.tree.bind("<Down>", lambda e: self.move_selection(1) or "break")
+        self.tree.bind("<Prior>", lambda e: self.move_selection(-self.height) or "break")  # Page Up
+        self.tree.bind("<Next>", lambda e: self.move_selection(self.height) or "break")  # Page Down
+
+    def set_rows(self, keys):  # Function to replace every row
+        self.rows = list(keys)  # Copy the keys
+        self.sort_keys = {key: self.get_sort_key(key) for key in self.rows}  # Compute every sort key once
+        if self.sort_column is not None:  # If a sort is active
+            self.rows.sort(key=self.column_key)  # Sort by it
+        self.render()  # Draw the rows on screen
+
+    def update_row(self, key):  # Function to add or refresh one row
+        sort_key = self.get_sort_key(key)  # Compute the new sort key
+        if key not in self.sort_keys:  # If this is a new row
+            self.sort_keys[key] = sort_key  # Remember its sort key
+            self.insert_sorted(key)  # Put it in place
+            self.render()  # Rows on screen may have shifted
+        elif self.sort_column is not None and sort_key[self.sort_column] != self.sort_keys[key][self.sort_column]:  # If the row moves
+            self.rows.remove(key)  # Take it out of its old place
+            self.sort_keys[key] = sort_key  # Remember its new sort key
+            self.insert_sorted(key)  # Put it in its new place
+            self.render()  # Rows on screen may have shifted
+        else:
+            self.sort_keys[key] = sort_key  # Remember its new sort key
+            if self.tree.exists(key):  # If the row is on screen
+                self.tree.item(key, values=self.get_values(key))  # Only redraw that row
+
+    def insert_sorted(self, key):  # Function to insert a row key at its sorted position
+        if self.sort_column is None:  # If no sort is active
+            self.rows.append(key)  # New rows go last, like in the library
+        else:
+            bisect.insort(self.rows, key, key=self.column_key)  # Binary search for the place
+
+    def column_key(self, key):  # Function to get the sort key of a row for the active column
+        return self.sort_keys[key][self.sort_column]  # Look up the precomputed key
+
+    @metrics.timed("table.sort_by")
+    def sort_by(self, column):  # Function called when a column header is clicked
+        if column == self.sort_column:  # If the same header is clicked again
+            self.reverse = not self.reverse  # Flip the order, the rows themselves stay put
+        else:
+            self.sort_column = column  # Sort by the new column
+            self.reverse = False  # Start in ascending order
+            self.rows.sort(key=self.column_key)  # Sort using the precomputed keys
+        self.render()  # Draw the rows on screen
+
+    def row_at(self, position):  # Function to get the row key shown at a position
+        return self.rows[len(self.rows) - 1 - position] if self.reverse else self.rows[position]  # Read backwards when reversed
+
+    @metrics.timed("table.render")
+    def render(self):  # Function to draw the rows on screen
+        self.top = max(0, min(self.top, len(self.rows) - self.height))  # Keep the view inside the rows
+        self.tree.delete(*self.tree.get_children())  # Remove the rows drawn before
+        for position in range(self.top, min(self.top + self.height, len(self.rows))):  # Only the rows on screen
+            key = self.row_at(position)  # Get the row key
+            tags = ("selected",) if key == self.selected else ()  # Mark the selected row
+            self.tree.insert("", "end", iid=key, values=self.get_values(key), tags=tags)  # Draw the row, keyed by row key
+        if self.rows:  # If there are rows
+            self.scrollbar.set(self.top / len(self.rows), min(1, (self.top + self.height) / len(self.rows)))  # Size the scrollbar
+        else:
+            self.scrollbar.set(0, 1)  # Nothing to scroll
+
+    def scroll_by(self, rows):  # Function to move the view by a number of rows
+        self.top += rows  # Move the view
+        self.render()  # Draw the rows on screen
+
+    def selected_position(self):  # Function to get the position of the selected row, or None
+        if self.selected is None or self.selected not in self.sort_keys:  # If nothing is selected or the row is gone
+            return None
+        if self.tree.exists(self.selected):  # If the row is on screen
+            return self.top + self.tree.index(self.selected)  # Its place among the drawn rows
+        index = self.rows.index(self.selected)  # Search every row, only when it is scrolled off screen
+        return len(self.rows) - 1 - index if self.reverse else index  # Read backwards when reversed
+
+    def move_selection(self, rows):  # Function to move the selection by a number of rows, scrolling when it leaves the screen
+        if not self.rows:  # Nothing to select
+            return
+        position = self.selected_position()  # Where the selection is now
+        if position is None:  # If nothing is selected yet
+            position = self.top - 1 if rows > 0 else self.top + 1  # Start from the edge of the view
+        position = max(0, min(position + rows, len(self.rows) - 1))  # Stay inside the rows
+        if position < self.top:  # If the row is above the view
+            self.top = position  # Scroll up to it
+            self.render()  # Draw the rows on screen
+        elif position >= self.top + self.height:  # If the row is below the view
+            self.top = position - self.height + 1  # Scroll down to it
+            self.render()  # Draw the rows on screen
+        key = self.row_at(position)  # Get the row key
+        self.tree.selection_set(key)  # Select it, which tells on_select and the screen
+        self.tree.focus(key)  # Keep the keyboard focus on it
+
+    def on_scroll(self, action, amount, unit=None):  # Function called by the scrollbar
+        if action == "moveto":  # If the scrollbar was dragged
+            self.top = int(float(amount) * len(self.rows))  # Jump to that position
+            self.render()  # Draw the rows on screen
+        elif action == "scroll":  # If an arrow or the trough was clicked
+            self.scroll_by(int(amount) * (self.height if unit == "pages" else 1))  # Move by rows or pages
+
+    def on_select(self, event):  # Function called when a row is clicked
+        selection = self.tree.selection()  # Get the selected row
+        if selection:  # Drawing rows again clears the selection, keep the last real one
+            if self.selected is not None and self.tree.exists(self.selected):  # If the old row is on screen
+                self.tree.item(self.selected, tags=())  # Unmark it
+            self.selected = selection[0]  # Remember the row key